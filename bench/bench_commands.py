@@ -0,0 +1,217 @@
+"""插件命令的端到端基准测试与压测。
+
+用法：python bench/bench_commands.py [--commands ssb,sxsy,sall,ssb-nav,sxsy-nav,sis,01bz,uaa]
+      [--requests 200] [--concurrency 20] [--latency-ms 20] [--results 20] [--pages 3]
+      [--page-kb 100] [--count 10] [--accounts 1] [--keywords 0] [--cold-nav]
+      [--result-cache] [--tracemalloc] [--stage-stats]
+
+在进程内启动 standin.py 的替身服务器，把插件的导航地址指向它，再用伪造的
+AstrMessageEvent 按指定并发调用各命令，统计吞吐、延迟分位数与内存占用。
+插件模块导入时依赖 astrbot.api，需要在安装了 AstrBot 的环境中运行。
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from standin import AUTH_COOKIE, StandIn, StandInConfig  # noqa: E402
+
+# 插件使用相对导入，按包加载，包名与插件注册名一致
+PACKAGE = "astrbot_plugin_soushuba"
+
+# 命令名 -> (处理函数, 消息文本, 冷启动时需清除网址缓存的站点)
+COMMANDS = {
+    "ssb": ("ssb_command", "ssb {keyword}", None),
+    "sxsy": ("sxsy_command", "sxsy {keyword}", None),
+    "sall": ("federated_command", "sall {keyword}", None),
+    "ssb-nav": ("ssb_command", "ssb", "ssb"),
+    "sxsy-nav": ("sxsy_command", "sxsy", "sxsy"),
+    "sis": ("sis_command", "sis", "sis"),
+    "01bz": ("dybz_command", "01bz", "01bz"),
+    "uaa": ("uaa_command", "uaa", "uaa"),
+}
+SUCCESS_MARKERS = ("✅", "成功找到")
+
+
+class FakeEvent:
+    """只实现插件命令用到的接口：message_str 与 plain_result"""
+
+    def __init__(self, message_str: str):
+        self.message_str = message_str
+
+    def plain_result(self, text: str) -> str:
+        return text
+
+
+class TempStarTools:
+    """把插件数据目录指向临时目录，避免基准测试写入 AstrBot 的数据目录"""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+
+    def get_data_dir(self, *_):
+        return self.data_dir
+
+
+def load_plugin_module():
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [ROOT]
+    sys.modules[PACKAGE] = package
+    try:
+        return importlib.import_module(f"{PACKAGE}.main")
+    except ImportError as e:
+        sys.exit(f"无法导入插件（需要安装 AstrBot）：{e}")
+
+
+def build_plugin(module, standin: StandIn, args, data_dir: str):
+    module.StarTools = TempStarTools(data_dir)
+    config = {
+        "ssb_auth": ";".join(f"bench{i}&password" for i in range(args.accounts)),
+        "sxsy_cookie": f"{AUTH_COOKIE}=bench",
+        "search_result_count": args.count,
+        "ssb_search_interval": args.ssb_interval,
+        "sxsy_search_interval": 0,
+        "search_queue_max": 0,
+        "result_cache_size": 200 if args.result_cache else 0,
+        "result_cache_persist": False,
+        "url_cache_persist": False,
+        "federated_timeout": 60,
+    }
+    plugin = module.SoushuBaLinkExtractorPlugin(None, config)
+    nav = standin.nav_url
+    plugin.target_domains = [f"{nav}ssb/"]
+    plugin.sxsy_navs = [f"{nav}sxsy/"]
+    plugin.sis_navs = [f"{nav}sis/"]
+    plugin.dybz_navs = [f"{nav}01bz/"]
+    plugin.uaa_navs = [f"{nav}uaa/"]
+    # 替身论坛只提供 HTTP
+    plugin.SXSY_SCHEME = "http"
+    return plugin
+
+
+async def invoke(plugin, handler_name: str, text: str):
+    start = time.perf_counter()
+    messages = [message async for message in getattr(plugin, handler_name)(FakeEvent(text))]
+    elapsed = time.perf_counter() - start
+    ok = any(marker in message for message in messages for marker in SUCCESS_MARKERS)
+    return elapsed, ok, messages
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def max_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+async def run_command(module, standin: StandIn, args, name: str):
+    handler_name, template, nav_site = COMMANDS[name]
+    data_dir = tempfile.mkdtemp(prefix="soushuba-bench-")
+    plugin = build_plugin(module, standin, args, data_dir)
+    try:
+        # 预热：解析网址、登录，不计入统计
+        for _ in range(args.warmup):
+            await invoke(plugin, handler_name, template.format(keyword="预热"))
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        failures = []
+
+        async def one(i: int):
+            keyword = f"斗罗{i % args.keywords if args.keywords else i}"
+            async with semaphore:
+                if args.cold_nav and nav_site:
+                    plugin.url_cache.invalidate(nav_site)
+                elapsed, ok, messages = await invoke(plugin, handler_name, template.format(keyword=keyword))
+            if not ok:
+                failures.append(messages[-1] if messages else "（无回复）")
+            return elapsed
+
+        searches_before = standin.ssb.searches + standin.sxsy.searches
+        if args.tracemalloc:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+
+        print(f"\n== {name}（{args.requests} 次，并发 {args.concurrency}）")
+        print(f"  吞吐:   {args.requests / wall:8.1f} 次/秒（总耗时 {wall:.2f} 秒）")
+        print(
+            f"  延迟:   p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+            f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  "
+            f"max {max(latencies) * 1000:7.1f} ms"
+        )
+        memory = f"  内存:   峰值 RSS {max_rss_mb():.1f} MB"
+        if peak is not None:
+            memory += f"，本轮 Python 分配峰值 {peak / 1024 / 1024:.1f} MB"
+        print(memory)
+        print(f"  站点搜索请求: {standin.ssb.searches + standin.sxsy.searches - searches_before}")
+        if failures:
+            print(f"  失败:   {len(failures)} 次，例如: {failures[0].strip()[:80]}")
+        if args.stage_stats:
+            print("  " + plugin.metrics.report().replace("\n", "\n  "))
+    finally:
+        await plugin.terminate()
+
+
+async def run(args):
+    module = load_plugin_module()
+    standin = StandIn(StandInConfig(args.latency_ms, args.results, args.pages, args.page_kb))
+    await standin.start()
+    if args.tracemalloc:
+        tracemalloc.start()
+    try:
+        for name in args.commands.split(","):
+            name = name.strip()
+            if name not in COMMANDS:
+                sys.exit(f"未知命令: {name}，可选: {', '.join(COMMANDS)}")
+            await run_command(module, standin, args, name)
+    finally:
+        await standin.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", default="ssb,sxsy,sall,ssb-nav,sxsy-nav,sis,01bz,uaa")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=20, help="替身服务器每个请求的延迟")
+    parser.add_argument("--results", type=int, default=20, help="替身搜索结果每页条数")
+    parser.add_argument("--pages", type=int, default=3, help="替身搜索结果总页数")
+    parser.add_argument("--page-kb", type=int, default=100, help="每个结果页额外填充的 KB 数")
+    parser.add_argument("--count", type=int, default=10, help="插件的 search_result_count")
+    parser.add_argument("--accounts", type=int, default=1, help="搜书吧账号数")
+    parser.add_argument("--ssb-interval", type=float, default=0, help="插件的 ssb_search_interval")
+    parser.add_argument("--keywords", type=int, default=0, help="不同关键词的数量，0 表示每次都不同")
+    parser.add_argument("--cold-nav", action="store_true", help="网址命令每次都清除网址缓存重新解析")
+    parser.add_argument("--result-cache", action="store_true", help="开启结果缓存")
+    parser.add_argument("--tracemalloc", action="store_true", help="统计 Python 内存分配峰值（会拖慢运行）")
+    parser.add_argument("--stage-stats", action="store_true", help="输出插件各阶段耗时统计")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""响应解码的性能对比。
+
+用法：python bench/bench_decode.py [--size-kb 300] [--rounds 50]
+
+用 GBK / UTF-8 的 Discuz 页面对比旧的逐个尝试编码方式与 charset.decode_html
+（响应头 / <meta> 探测 + 按站点记忆编码）的解码耗时与解码次数。
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from charset import decode_html, sniff_charset  # noqa: E402
+
+FIXTURE = os.path.join(BENCH_DIR, "fixtures", "ssb_search.html")
+
+
+def legacy_decode(content: bytes, charset):
+    """旧实现：响应头编码失败后依次尝试 utf-8 / gbk / gb2312 / big5，返回 (文本, 解码次数)"""
+    attempts = 0
+    if charset:
+        attempts += 1
+        try:
+            return content.decode(charset), attempts
+        except Exception:
+            pass
+    for encoding in ["utf-8", "gbk", "gb2312", "big5"]:
+        attempts += 1
+        try:
+            return content.decode(encoding), attempts
+        except UnicodeDecodeError:
+            continue
+    return content.decode("utf-8", errors="ignore"), attempts
+
+
+def build_page(size_kb: int, meta_charset: str, late_rare_char: bool) -> str:
+    """以 fixture 为模板合成指定大小的页面；meta_charset 为空时去掉声明编码的 <meta> 标签，
+    late_rare_char 时在页尾放入 GB2312 之外的字符"""
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        template = f.read()
+    if meta_charset:
+        template = template.replace("charset=gbk", f"charset={meta_charset}")
+    else:
+        template = re.sub(r"<meta[^>]*charset[^>]*>\s*", "", template, flags=re.IGNORECASE)
+    head, tail = template.split("<ul>", 1)
+    row = '<li class="pbw"><h3 class="xs3"><a href="thread-1-1-1.html">斗罗大陆 第{0}卷</a></h3><p><span>2023-5-6</span></p></li>\n'
+    rows, i = [], 0
+    while len(head) + sum(len(r) for r in rows) < size_kb * 1024 // 2:
+        rows.append(row.format(i))
+        i += 1
+    if late_rare_char:
+        # “镕”“堃” 在 GBK 中但不在 GB2312 中，声明为 gb2312 的页面常见此类字符
+        rows.append('<li class="pbw"><h3 class="xs3"><a href="thread-2-1-1.html">朱镕基 王堃</a></h3></li>\n')
+    return head + "<ul>" + "".join(rows) + tail
+
+
+def measure(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    cases = [
+        # (名称, 页面编码, 响应头 charset, <meta> charset, 页尾生僻字)
+        ("GBK 页面，响应头声明 gb2312，页尾含 GB2312 外字符", "gbk", "gb2312", "gb2312", True),
+        ("GBK 页面，响应头未声明编码", "gbk", None, "gbk", False),
+        ("GBK 页面，响应头与 <meta> 均未声明编码", "gbk", None, "", False),
+        ("UTF-8 页面，响应头未声明编码", "utf-8", None, "utf-8", False),
+    ]
+    print(f"{args.rounds} 轮平均")
+    for name, page_encoding, header_charset, meta_charset, rare in cases:
+        content = build_page(args.size_kb, meta_charset, rare).encode(page_encoding)
+        # 未声明编码的页面必须探测不到编码，才会走到 hint 与逐个尝试的路径
+        assert meta_charset or sniff_charset(content) is None, name
+
+        legacy_text, attempts = legacy_decode(content, header_charset)
+        new_text, encoding = decode_html(content, header_charset)
+        assert legacy_text == new_text, name
+        # 同站点后续响应：带上记住的编码
+        memo_text, _ = decode_html(content, header_charset, encoding)
+        assert memo_text == new_text, name
+
+        legacy_ms = measure(lambda: legacy_decode(content, header_charset), args.rounds)
+        new_ms = measure(lambda: decode_html(content, header_charset), args.rounds)
+        memo_ms = measure(lambda: decode_html(content, header_charset, encoding), args.rounds)
+        print(f"- {name}（{len(content) // 1024} KB）")
+        print(f"    旧实现: {legacy_ms:7.2f} ms（尝试 {attempts} 次）")
+        print(f"    探测:   {new_ms:7.2f} ms（使用 {encoding}）")
+        print(f"    记忆:   {memo_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""搜索结果解析的回归校验与性能对比。
+
+用法：python bench/bench_parser.py [--items 50] [--padding-kb 300] [--rounds 50]
+
+先用 fixtures 下的搜索结果页校验 discuz.parse_threadlist 与旧的
+BeautifulSoup 全页解析结果一致，再用合成的大页面对比两者的解析耗时。
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from discuz import parse_threadlist  # noqa: E402
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASE_URL = "https://www.example.com/"
+
+
+def legacy_parse(html: str, base_url: str, limit: int):
+    """旧实现：BeautifulSoup 解析整页后用 CSS 选择器取结果"""
+    soup = BeautifulSoup(html, "lxml")
+    items = soup.select("div#threadlist ul li.pbw") or soup.select("div.slst ul li.pbw")
+    results = []
+    for item in items[:limit]:
+        title_el = item.select_one("h3.xs3 a")
+        if not title_el:
+            continue
+        title = "".join(title_el.find_all(string=True, recursive=True)).strip()
+        link = urljoin(base_url, title_el["href"])
+        time_text = "未知"
+        time_span = item.select_one("p span")
+        if time_span:
+            time_text = time_span.get_text(strip=True)
+        results.append({"title": title, "link": link, "time": time_text})
+    return results
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def build_page(items: int, padding_kb: int) -> str:
+    """以 fixture 为模板合成指定条数、指定页头体积的搜索结果页"""
+    template = load_fixture("ssb_search.html")
+    head, rest = template.split('<div class="slst mtw" id="threadlist">', 1)
+    item_tpl = rest[rest.index('<li class="pbw" id="1001">'):rest.index('<li class="pbw" id="1002">')]
+    tail = rest[rest.index("</ul>"):]
+
+    filler = '<div class="bm"><a href="forum-{0}-1.html">版块 {0}</a><p class="xg2">版块介绍与公告文字</p></div>\n'
+    padding, i = [], 0
+    while sum(len(p) for p in padding) < padding_kb * 1024:
+        padding.append(filler.format(i))
+        i += 1
+
+    body = "".join(item_tpl.replace("1001", str(10000 + n)) for n in range(items))
+    return head + "".join(padding) + '<div class="slst mtw" id="threadlist">\n<ul>\n' + body + tail
+
+
+def check_fixtures():
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        if not name.endswith("_search.html"):
+            continue
+        html = load_fixture(name)
+        expected = legacy_parse(html, BASE_URL, 100)
+        actual = parse_threadlist(html, BASE_URL, 100)
+        if expected != actual:
+            print(f"[FAIL] {name}")
+            for e, a in zip(expected, actual):
+                if e != a:
+                    print(f"  legacy: {e}\n  new:    {a}")
+            if len(expected) != len(actual):
+                print(f"  legacy {len(expected)} 条, new {len(actual)} 条")
+            return False
+        print(f"[OK] {name}: {len(actual)} 条结果一致")
+    return True
+
+
+def timeit(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--padding-kb", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    if not check_fixtures():
+        sys.exit(1)
+
+    html = build_page(args.items, args.padding_kb)
+    assert legacy_parse(html, BASE_URL, args.items) == parse_threadlist(html, BASE_URL, args.items)
+
+    legacy_ms = timeit(lambda: legacy_parse(html, BASE_URL, 10), args.rounds)
+    new_ms = timeit(lambda: parse_threadlist(html, BASE_URL, 10), args.rounds)
+    print(f"页面大小 {len(html) // 1024} KB, {args.items} 条结果, 每轮取 10 条, {args.rounds} 轮平均")
+    print(f"  BeautifulSoup 全页解析: {legacy_ms:8.2f} ms")
+    print(f"  lxml 片段 + XPath:      {new_ms:8.2f} ms  ({legacy_ms / new_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""本地 Discuz / 导航站替身服务器。
+
+用法：python bench/standin.py [--latency-ms 50] [--results 20] [--pages 3] [--page-kb 0]
+
+在本机启动三个端口：
+- 导航站：搜书吧导航（JS 跳转 -> meta 跳转 -> 落地页）、尚香书苑、第一会所、第一版主、有爱爱导航页
+- 搜书吧论坛与尚香书苑论坛：member.php 登录、home.php?mod=spacecp 登录校验、
+  search.php 搜索表单、搜索提交与 GBK 编码的分页搜索结果
+
+页面结构模仿真实站点，结果条数、总页数、页面体积与每个请求的延迟均可配置。
+bench_commands.py 会在进程内启动它，也可以单独运行后用浏览器或 curl 访问。
+"""
+import argparse
+import asyncio
+import itertools
+from html import escape
+from typing import Dict, Optional
+from urllib.parse import unquote_to_bytes
+
+from aiohttp import web
+
+AUTH_COOKIE = "bench_auth"
+FORMHASH = "1a2b3c4d"
+
+NAV_SIS = '<html><body><ul><li><a href="{url}">地址一</a></li><li><a href="{url}">地址二</a></li></ul></body></html>'
+NAV_DYBZ = '<html><body><p><a href="{url}">最新线路 1</a></p><p><a href="{url}">备用线路</a></p></body></html>'
+NAV_UAA = '<html><body><ul><li><span>备用</span><a href="{url}backup">备用</a></li><li><span>最新地址</span><a href="{url}">进入</a></li></ul></body></html>'
+NAV_SXSY = '<html><body><a href="https://{host}">尚香书苑</a></body></html>'
+
+PAGE_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=gbk" />
+<title>{title} -  Powered by Discuz!</title>
+</head>
+<body>
+<div id="toptb" class="cl">{toolbar}</div>
+"""
+PAGE_TAIL = """<div id="ft" class="wp cl"><p><a href="archiver/">Archiver</a></p></div>
+</body>
+</html>
+"""
+# 模拟页头导航、广告等与结果无关的内容，用于调节页面体积
+PADDING_ROW = '<li><a href="forum.php?mod=forumdisplay&amp;fid={0}" title="版块 {0}">版块 {0}</a><span class="xg1">今日: {0}</span></li>\n'
+RESULT_ROW = """<li class="pbw" id="{tid}">
+<h3 class="xs3">
+<a href="forum.php?mod=viewthread&amp;tid={tid}&amp;highlight=" target="_blank">{keyword} 第{tid}章</a>
+</h3>
+<p class="xg1">{replies} 个回复 - {views} 次查看</p>
+<p>替身服务器生成的搜索结果摘要</p>
+<p>
+<span>2024-5-{day} 12:{minute:02d}</span>
+ -
+<span><a href="space-uid-{tid}.html" target="_blank">作者{tid}</a></span>
+</p>
+</li>
+"""
+
+
+class StandInConfig:
+    def __init__(self, latency_ms: float = 0, results: int = 20, pages: int = 3, page_kb: int = 0):
+        self.latency = latency_ms / 1000
+        self.results = results  # 每页结果数
+        self.pages = pages  # 搜索结果总页数
+        self.page_kb = page_kb  # 每个结果页额外填充的体积
+
+
+class DiscuzForum:
+    """一个 Discuz 论坛替身：账号任意，登录后用 Cookie 标记会话"""
+
+    def __init__(self, name: str, config: StandInConfig):
+        self.name = name
+        self.config = config
+        self._searchids = itertools.count(1)
+        self._keywords: Dict[str, str] = {}
+        self.searches = 0
+
+    def routes(self):
+        return [
+            web.get("/member.php", self.login_page),
+            web.post("/member.php", self.login_submit),
+            web.get("/home.php", self.spacecp),
+            web.get("/search.php", self.search_page),
+            web.post("/search.php", self.search_submit),
+        ]
+
+    @staticmethod
+    def _user(request: web.Request) -> Optional[str]:
+        return request.cookies.get(AUTH_COOKIE)
+
+    def _render(self, request: web.Request, title: str, body: str) -> web.Response:
+        user = self._user(request)
+        if user:
+            toolbar = f'<a href="home.php?mod=space">{escape(user)}</a><a href="member.php?mod=logging&amp;action=logout&amp;formhash={FORMHASH}">退出</a>'
+        else:
+            toolbar = '<a href="member.php?mod=logging&amp;action=login">登录</a>'
+        html = PAGE_HEAD.format(title=f"{title} - {self.name}", toolbar=toolbar) + body + PAGE_TAIL
+        return web.Response(body=html.encode("gbk", "xmlcharrefreplace"), content_type="text/html", charset="gbk")
+
+    @staticmethod
+    def _form() -> str:
+        return f'<form method="post" action="search.php?mod=forum"><input type="hidden" name="formhash" value="{FORMHASH}" /></form>\n'
+
+    async def login_page(self, request: web.Request) -> web.Response:
+        return self._render(request, "登录", self._form())
+
+    async def login_submit(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        response = web.Response(text='<?xml version="1.0" encoding="gbk"?><root><![CDATA[欢迎您回来]]></root>')
+        if data.get("formhash") == FORMHASH and data.get("username"):
+            response.set_cookie(AUTH_COOKIE, data["username"])
+        return response
+
+    async def spacecp(self, request: web.Request) -> web.Response:
+        if not self._user(request):
+            raise web.HTTPFound("/member.php?mod=logging&action=login")
+        return self._render(request, "个人设置", f"<p>{escape(self._user(request))} 的个人资料</p>\n")
+
+    async def search_submit(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        # 搜书吧以 GBK 编码提交表单，不能交给 request.post() 按 UTF-8 解析
+        fields = dict(pair.split(b"=", 1) for pair in body.split(b"&") if b"=" in pair)
+        if fields.get(b"formhash", b"").decode("ascii", "ignore") != FORMHASH:
+            return self._render(request, "提示信息", "<p>您当前的访问请求当中含有非法字符，表单验证串不符</p>\n")
+        if not self._user(request):
+            return self._render(request, "提示信息", "<p>抱歉，您尚未登录，无法进行此操作，请先登录</p>\n")
+
+        raw = unquote_to_bytes(fields.get(b"srchtxt", b"").replace(b"+", b" "))
+        try:
+            keyword = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            keyword = raw.decode("gbk", "replace")
+
+        searchid = str(next(self._searchids))
+        self._keywords[searchid] = keyword
+        self.searches += 1
+        raise web.HTTPFound(
+            f"/search.php?mod=forum&searchid={searchid}&orderby=lastpost&ascdesc=desc&searchsubmit=yes"
+        )
+
+    async def search_page(self, request: web.Request) -> web.Response:
+        searchid = request.query.get("searchid")
+        if not searchid:
+            return self._render(request, "搜索", self._form())
+        keyword = self._keywords.get(searchid, "")
+        page = max(1, int(request.query.get("page", "1")))
+        return self._render(request, "搜索", self._results(searchid, keyword, page))
+
+    def _results(self, searchid: str, keyword: str, page: int) -> str:
+        config = self.config
+        parts = ['<ul class="p_pop">\n']
+        i, size = 0, 0
+        while size < config.page_kb * 1024:
+            row = PADDING_ROW.format(i)
+            parts.append(row)
+            size += len(row.encode("gbk"))
+            i += 1
+        parts.append("</ul>\n")
+
+        parts.append(f'<div class="sttl mbn"><h2>结果: <em>找到 “{escape(keyword)}” 相关内容 {config.results * config.pages} 个</em></h2></div>\n')
+        parts.append('<div class="slst mtw" id="threadlist"><ul>\n')
+        if page <= config.pages:
+            for n in range(config.results):
+                tid = int(searchid) * 100000 + (page - 1) * config.results + n
+                parts.append(RESULT_ROW.format(
+                    tid=tid, keyword=escape(keyword), replies=n, views=n * 10,
+                    day=1 + n % 28, minute=n % 60,
+                ))
+        parts.append("</ul></div>\n")
+
+        link = f"search.php?mod=forum&amp;searchid={searchid}&amp;orderby=lastpost&amp;ascdesc=desc&amp;searchsubmit=yes"
+        pager = "".join(
+            f"<strong>{p}</strong>" if p == page else f'<a href="{link}&amp;page={p}">{p}</a>'
+            for p in range(1, config.pages + 1)
+        )
+        parts.append(f'<div class="pg">{pager}<label><span title="共 {config.pages} 页"> / {config.pages} 页</span></label></div>\n')
+        return "".join(parts)
+
+
+class StandIn:
+    """在本机随机端口上启动导航站与两个论坛替身"""
+
+    def __init__(self, config: StandInConfig, host: str = "127.0.0.1"):
+        self.config = config
+        self.host = host
+        self.ssb = DiscuzForum("搜书吧", config)
+        self.sxsy = DiscuzForum("尚香书苑", config)
+        self.nav_requests = 0
+        self._runners = []
+        self.nav_url = self.ssb_url = self.sxsy_host = ""
+
+    @web.middleware
+    async def _latency(self, request: web.Request, handler):
+        if self.config.latency > 0:
+            await asyncio.sleep(self.config.latency)
+        return await handler(request)
+
+    async def _serve(self, routes, port: int = 0) -> int:
+        app = web.Application(middlewares=[self._latency])
+        app.add_routes(routes)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, port)
+        await site.start()
+        self._runners.append(runner)
+        return runner.addresses[0][1]
+
+    async def start(self, nav_port: int = 0, ssb_port: int = 0, sxsy_port: int = 0):
+        ssb_port = await self._serve(self.ssb.routes(), ssb_port)
+        sxsy_port = await self._serve(self.sxsy.routes(), sxsy_port)
+        self.ssb_url = f"http://{self.host}:{ssb_port}/"
+        self.sxsy_host = f"{self.host}:{sxsy_port}"
+        nav_port = await self._serve([web.get("/{site}/{page:.*}", self.nav_page)], nav_port)
+        self.nav_url = f"http://{self.host}:{nav_port}/"
+
+    async def stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners.clear()
+
+    async def nav_page(self, request: web.Request) -> web.Response:
+        self.nav_requests += 1
+        site, page = request.match_info["site"], request.match_info["page"]
+        if site == "ssb":
+            # 与真实导航站一致：入口页 JS 跳转，中间页 meta 跳转，落地页给出 a.link
+            if page == "":
+                html = '<html><script>window.location.href = "/ssb/refresh";</script></html>'
+            elif page == "refresh":
+                html = '<html><head><meta http-equiv="refresh" content="0; url=/ssb/land"></head></html>'
+            else:
+                html = f'<html><body><a class="link" href="{self.ssb_url}">搜书吧</a></body></html>'
+        elif site == "sxsy":
+            html = NAV_SXSY.format(host=self.sxsy_host)
+        elif site == "sis":
+            html = NAV_SIS.format(url="http://sis.bench.invalid/forum/")
+        elif site == "01bz":
+            html = NAV_DYBZ.format(url="http://01bz.bench.invalid/")
+        elif site == "uaa":
+            html = NAV_UAA.format(url="http://uaa.bench.invalid/")
+        else:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html")
+
+
+async def serve_forever(args):
+    standin = StandIn(StandInConfig(args.latency_ms, args.results, args.pages, args.page_kb))
+    await standin.start(args.nav_port, args.ssb_port, args.sxsy_port)
+    print(f"导航站:     {standin.nav_url}{{ssb,sxsy,sis,01bz,uaa}}/")
+    print(f"搜书吧:     {standin.ssb_url}")
+    print(f"尚香书苑:   http://{standin.sxsy_host}/")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--results", type=int, default=20, help="每页结果数")
+    parser.add_argument("--pages", type=int, default=3, help="搜索结果总页数")
+    parser.add_argument("--page-kb", type=int, default=0, help="每个结果页额外填充的 KB 数")
+    parser.add_argument("--nav-port", type=int, default=8601)
+    parser.add_argument("--ssb-port", type=int, default=8602)
+    parser.add_argument("--sxsy-port", type=int, default=8603)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
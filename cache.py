@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class URLCache:
+    """站点最新网址缓存。
+
+    超过 ttl 的条目仍会返回（标记为过期），由调用方在后台刷新，
+    即 stale-while-revalidate。
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, dict] = {}
+
+    def get(self, site: str) -> Tuple[Optional[str], bool]:
+        """返回 (网址, 是否过期)，未命中时返回 (None, True)"""
+        entry = self._entries.get(site)
+        if not entry:
+            return None, True
+        return entry["url"], time.time() - entry["time"] > self.ttl
+
+    def set(self, site: str, url: str):
+        self._entries[site] = {"url": url, "time": time.time()}
+
+    def invalidate(self, site: str):
+        self._entries.pop(site, None)
+
+    def load(self, data: Optional[dict]):
+        if not isinstance(data, dict):
+            return
+        for site, entry in data.items():
+            if isinstance(entry, dict) and entry.get("url") and isinstance(entry.get("time"), (int, float)):
+                self._entries[site] = {"url": entry["url"], "time": entry["time"]}
+
+    def dump(self) -> dict:
+        return {site: dict(entry) for site, entry in self._entries.items()}
+
+
+class ResultCache:
+    """搜索结果缓存，按 LRU 淘汰，超过 ttl 的条目视为失效"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    @staticmethod
+    def make_key(site: str, keyword: str, count: int) -> str:
+        normalized = " ".join(keyword.split()).lower()
+        return f"{site}|{normalized}|{count}"
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        if time.time() - entry["time"] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry["results"]
+
+    def set(self, key: str, results: List[dict]):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = {"results": results, "time": time.time()}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def load(self, data: Optional[dict]):
+        if not isinstance(data, dict) or self.max_size <= 0:
+            return
+        now = time.time()
+        # dump() 按 LRU 顺序输出，按原顺序载入即可恢复淘汰顺序
+        for key, entry in data.items():
+            if not isinstance(entry, dict) or not isinstance(entry.get("results"), list):
+                continue
+            if not isinstance(entry.get("time"), (int, float)) or now - entry["time"] > self.ttl:
+                continue
+            self.set(key, entry["results"])
+            self._entries[key]["time"] = entry["time"]
+
+    def dump(self) -> dict:
+        return {key: dict(entry) for key, entry in self._entries.items()}
@@ -0,0 +1,60 @@
+import codecs
+import re
+from typing import Optional, Tuple
+
+# 只在响应开头查找编码声明，<meta charset> 与 http-equiv Content-Type 都会出现在 <head> 前部
+SNIFF_BYTES = 2048
+_META_CHARSET = re.compile(rb"""<meta[^>]+?charset\s*=\s*["']?\s*([a-zA-Z0-9_.:\-]+)""", re.IGNORECASE)
+
+FALLBACK_ENCODINGS = ("utf-8", "gbk", "gb2312", "big5")
+
+# 声明为 GB2312 的页面常夹杂 GB2312 之外的字符，按超集 GBK 解码，一次即可成功
+_SUPERSETS = {"gb2312": "gbk"}
+
+
+def normalize_charset(name: Optional[str]) -> Optional[str]:
+    """规范化编码名，未知编码返回 None"""
+    if not name:
+        return None
+    try:
+        codec = codecs.lookup(name.strip().strip("\"'")).name
+    except LookupError:
+        return None
+    return _SUPERSETS.get(codec, codec)
+
+
+def sniff_charset(content: bytes) -> Optional[str]:
+    """从响应开头的 <meta> 标签中探测编码"""
+    match = _META_CHARSET.search(content[:SNIFF_BYTES])
+    if not match:
+        return None
+    return normalize_charset(match.group(1).decode("ascii", "ignore"))
+
+
+def decode_html(content: bytes, declared: Optional[str] = None, hint: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """解码响应内容，返回 (文本, 实际使用的编码)。
+
+    依次尝试响应头声明的编码、页面 <meta> 声明的编码、调用方记住的编码 hint，
+    都失败时才逐个尝试常见编码；全部失败则忽略错误按 UTF-8 解码，编码返回 None。
+    """
+    tried = set()
+    for encoding in (normalize_charset(declared), sniff_charset(content), normalize_charset(hint)):
+        if not encoding or encoding in tried:
+            continue
+        tried.add(encoding)
+        try:
+            return content.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+
+    for encoding in FALLBACK_ENCODINGS:
+        encoding = normalize_charset(encoding)
+        if encoding in tried:
+            continue
+        tried.add(encoding)
+        try:
+            return content.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+
+    return content.decode("utf-8", errors="ignore"), None
@@ -0,0 +1,112 @@
+import re
+from html import unescape
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse
+
+from lxml import etree
+
+_HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+
+# 搜索结果列表容器：搜书吧为 div#threadlist，部分站点仅有 div.slst
+_THREADLIST_MARKERS = ('id="threadlist"', 'class="slst')
+_ITEMS_XPATH = etree.XPath(
+    "//div[@id='threadlist' or {slst}]//ul/li[{pbw}]".format(
+        slst=_HAS_CLASS.format("slst"), pbw=_HAS_CLASS.format("pbw")
+    )
+)
+_TITLE_XPATH = etree.XPath(".//h3[{}]//a".format(_HAS_CLASS.format("xs3")))
+_TIME_XPATH = etree.XPath(".//p//span")
+
+_HTML_PARSER = etree.HTMLParser(recover=True, no_network=True)
+
+_FORMHASH = re.compile(r'name="formhash" value="([a-f0-9]+)"')
+
+# 分页：优先读取 “共 N 页”，否则取分页栏链接中的最大页码
+_PAGE_TOTAL = re.compile(r"共\s*(\d+)\s*页")
+_PAGE_PARAM = re.compile(r"[?&;]page=(\d+)")
+_PAGER_SCAN = 4096
+_SEARCH_LINK = re.compile(r'href="(search\.php\?[^"]*searchid=\d+[^"]*)"')
+
+
+def extract_formhash(html: str) -> str:
+    """提取页面表单中的 formhash，没有时返回空字符串"""
+    match = _FORMHASH.search(html)
+    return match.group(1) if match else ""
+
+
+def _find_threadlist_start(html: str) -> int:
+    for marker in _THREADLIST_MARKERS:
+        idx = html.find(marker)
+        if idx != -1:
+            return html.rfind("<", 0, idx)
+    return -1
+
+
+def parse_threadlist(html: str, base_url: str, limit: int) -> List[dict]:
+    """解析 Discuz 搜索结果页，返回 [{"title", "link", "time"}, ...]。
+
+    只把结果列表容器开始之后的片段交给 lxml 解析，跳过页头、导航等无关内容；
+    纯 CPU 计算，调用方应放到线程池中执行以免阻塞事件循环。
+    """
+    start = _find_threadlist_start(html)
+    if start == -1:
+        return []
+
+    root = etree.fromstring(html[start:], _HTML_PARSER)
+    if root is None:
+        return []
+
+    results = []
+    for item in _ITEMS_XPATH(root):
+        if len(results) >= limit:
+            break
+        title_els = _TITLE_XPATH(item)
+        if not title_els:
+            continue
+        title_el = title_els[0]
+
+        title = "".join(title_el.itertext()).strip()
+        link = urljoin(base_url, title_el.get("href", ""))
+
+        time_text = "未知"
+        time_spans = _TIME_XPATH(item)
+        if time_spans:
+            time_text = "".join(text.strip() for text in time_spans[0].itertext())
+
+        results.append({"title": title, "link": link, "time": time_text})
+    return results
+
+
+def search_page_count(html: str) -> int:
+    """读取搜索结果页的总页数，没有分页时为 1"""
+    match = _PAGE_TOTAL.search(html)
+    if match:
+        return int(match.group(1))
+    start = html.find('class="pg"')
+    if start == -1:
+        return 1
+    return max((int(page) for page in _PAGE_PARAM.findall(html, start, start + _PAGER_SCAN)), default=1)
+
+
+def search_page_url(final_url: str, html: str, page: int) -> Optional[str]:
+    """构造搜索结果第 page 页的地址。
+
+    搜索 POST 跳转后的地址带有 searchid，直接替换其 page 参数；否则从分页链接中取得。
+    查询参数按 latin-1 往返以保留 GBK 编码的关键词。找不到 searchid 时返回 None。
+    """
+    if "searchid=" in final_url:
+        url = final_url
+    else:
+        match = _SEARCH_LINK.search(html)
+        if not match:
+            return None
+        url = urljoin(final_url, unescape(match.group(1)))
+
+    parsed = urlparse(url)
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True, encoding="latin-1")
+        if key != "page"
+    ]
+    query.append(("page", str(page)))
+    return parsed._replace(query=urlencode(query, encoding="latin-1")).geturl()
@@ -0,0 +1,111 @@
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class MirrorHealth:
+    """导航镜像健康度统计。
+
+    按镜像记录最近若干次访问的成败与耗时：按成功率和耗时排序候选镜像，
+    连续失败达到阈值后熔断一段时间，超时时间取自观测到的 p95 耗时。
+    """
+
+    WINDOW = 50
+    MIN_SAMPLES = 5
+    TIMEOUT_FACTOR = 1.5
+    MIN_TIMEOUT = 3.0
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 600):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._mirrors: Dict[str, dict] = {}
+
+    def _get(self, url: str) -> dict:
+        mirror = self._mirrors.get(url)
+        if mirror is None:
+            mirror = {
+                "results": deque(maxlen=self.WINDOW),
+                "latencies": deque(maxlen=self.WINDOW),
+                "failures": 0,
+                "open_until": 0.0,
+            }
+            self._mirrors[url] = mirror
+        return mirror
+
+    def record(self, url: str, ok: bool, latency: float):
+        mirror = self._get(url)
+        mirror["results"].append(ok)
+        if ok:
+            mirror["latencies"].append(latency)
+            mirror["failures"] = 0
+            mirror["open_until"] = 0.0
+        else:
+            mirror["failures"] += 1
+            # 半开状态下再次失败也会立即重新熔断
+            if mirror["failures"] >= self.failure_threshold:
+                mirror["open_until"] = time.time() + self.cooldown
+
+    def is_open(self, url: str) -> bool:
+        mirror = self._mirrors.get(url)
+        return bool(mirror) and mirror["open_until"] > time.time()
+
+    def success_rate(self, url: str) -> float:
+        """带先验的成功率，未访问过的镜像视为 0.5 以上，保证新镜像有机会被尝试"""
+        results = self._mirrors[url]["results"] if url in self._mirrors else ()
+        return (sum(results) + 1) / (len(results) + 2)
+
+    def percentile(self, url: str, q: float) -> Optional[float]:
+        mirror = self._mirrors.get(url)
+        if not mirror or len(mirror["latencies"]) < self.MIN_SAMPLES:
+            return None
+        samples = sorted(mirror["latencies"])
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def order(self, urls: List[str]) -> List[str]:
+        """按健康度排序候选镜像并剔除熔断中的镜像；全部熔断时仍返回全部以便探测恢复"""
+        available = [url for url in urls if not self.is_open(url)] or list(urls)
+
+        def key(url: str):
+            p50 = self.percentile(url, 0.5)
+            return (-round(self.success_rate(url), 1), p50 if p50 is not None else float("inf"))
+
+        return sorted(available, key=key)
+
+    def timeout_for(self, url: str, default: float) -> float:
+        p95 = self.percentile(url, 0.95)
+        if p95 is None:
+            return default
+        return min(default, max(self.MIN_TIMEOUT, p95 * self.TIMEOUT_FACTOR))
+
+    def summary(self, url: str) -> dict:
+        mirror = self._mirrors.get(url)
+        return {
+            "samples": len(mirror["results"]) if mirror else 0,
+            "success_rate": self.success_rate(url),
+            "p50": self.percentile(url, 0.5),
+            "p95": self.percentile(url, 0.95),
+            "open": self.is_open(url),
+        }
+
+    def dump(self) -> dict:
+        return {
+            url: {
+                "results": list(mirror["results"]),
+                "latencies": [round(latency, 3) for latency in mirror["latencies"]],
+                "failures": mirror["failures"],
+                "open_until": mirror["open_until"],
+            }
+            for url, mirror in self._mirrors.items()
+        }
+
+    def load(self, data: Optional[dict]):
+        if not isinstance(data, dict):
+            return
+        for url, entry in data.items():
+            if not isinstance(entry, dict):
+                continue
+            mirror = self._get(url)
+            mirror["results"].extend(bool(r) for r in entry.get("results", []))
+            mirror["latencies"].extend(float(l) for l in entry.get("latencies", []))
+            mirror["failures"] = int(entry.get("failures", 0))
+            mirror["open_until"] = float(entry.get("open_until", 0.0))
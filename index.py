@@ -0,0 +1,130 @@
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from typing import List
+
+# 帖子链接中的 tid：thread-123-1-1.html 或 viewthread&tid=123
+_TID = re.compile(r"thread-(\d+)-|[?&]tid=(\d+)")
+
+# trigram 分词至少需要 3 个字符，更短的关键词改用 LIKE 匹配
+_TRIGRAM_MIN = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    site TEXT NOT NULL,
+    tid TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    posted TEXT,
+    seen REAL NOT NULL,
+    PRIMARY KEY (site, tid)
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS threads_fts USING fts5(
+    title, content='threads', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS threads_ai AFTER INSERT ON threads BEGIN
+    INSERT INTO threads_fts(rowid, title) VALUES (new.rowid, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS threads_ad AFTER DELETE ON threads BEGIN
+    INSERT INTO threads_fts(threads_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS threads_au AFTER UPDATE OF title ON threads BEGIN
+    INSERT INTO threads_fts(threads_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    INSERT INTO threads_fts(rowid, title) VALUES (new.rowid, new.title);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO threads (site, tid, title, link, posted, seen) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (site, tid) DO UPDATE SET
+    title = excluded.title, link = excluded.link, posted = excluded.posted, seen = excluded.seen
+"""
+
+
+def thread_id(link: str) -> str:
+    """从帖子链接中提取 tid，无法识别时以链接本身作为标识"""
+    match = _TID.search(link)
+    if not match:
+        return link
+    return match.group(1) or match.group(2)
+
+
+class ThreadIndex:
+    """搜索到的帖子标题的本地 SQLite 全文索引。
+
+    按 (站点, tid) 去重保存每次搜索结果中的标题、链接与时间；写入先进入缓冲区，
+    再在线程中以单个事务批量写入。站点不可用时可从索引中即时查询。
+    使用 FTS5 trigram 分词，SQLite 不支持时退回 LIKE 匹配。
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self._fts = True
+        except sqlite3.OperationalError:
+            self._fts = False
+        self._db_lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._pending: List[tuple] = []
+
+    @property
+    def fts_enabled(self) -> bool:
+        return self._fts
+
+    def add(self, site: str, records: List[dict]):
+        """将搜索结果放入写入缓冲区，由 flush() 批量写入"""
+        now = time.time()
+        self._pending.extend(
+            (site, thread_id(r["link"]), r["title"], r["link"], r.get("time"), now)
+            for r in records
+            if r.get("title") and r.get("link")
+        )
+
+    async def flush(self):
+        """把缓冲区中的记录在一个事务内写入；写入期间新加入的记录会在同一次调用中继续写入"""
+        async with self._flush_lock:
+            while self._pending:
+                rows, self._pending = self._pending, []
+                await asyncio.to_thread(self._write, rows)
+
+    def _write(self, rows: List[tuple]):
+        with self._db_lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+
+    async def search(self, site: str, keyword: str, limit: int) -> List[dict]:
+        return await asyncio.to_thread(self._search, site, keyword, limit)
+
+    def _search(self, site: str, keyword: str, limit: int) -> List[dict]:
+        terms = keyword.split()
+        if not terms:
+            return []
+        if self._fts and all(len(term) >= _TRIGRAM_MIN for term in terms):
+            query = " AND ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+            sql = (
+                "SELECT t.title, t.link, t.posted FROM threads_fts f JOIN threads t ON t.rowid = f.rowid "
+                "WHERE threads_fts MATCH ? AND t.site = ? ORDER BY f.rank LIMIT ?"
+            )
+            params = (query, site, limit)
+        else:
+            conditions = " AND ".join("title LIKE ? ESCAPE '\\'" for _ in terms)
+            sql = f"SELECT title, link, posted FROM threads WHERE site = ? AND {conditions} ORDER BY seen DESC LIMIT ?"
+            params = (site, *(f"%{_escape_like(term)}%" for term in terms), limit)
+        with self._db_lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{"title": title, "link": link, "time": posted or "未知"} for title, link, posted in rows]
+
+    async def close(self):
+        await self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
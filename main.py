@@ -1,19 +1,53 @@
-﻿import json
-import asyncio
+﻿import asyncio
 import aiohttp
 from bs4 import BeautifulSoup
+from html import unescape
 from urllib.parse import urljoin, urlparse, urlencode
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional
 import os
 import re
 import datetime
+import math
 
 import time
+import unicodedata
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult
 from astrbot.api.star import Context, Star, register, StarTools
 from astrbot.api.message_components import Plain
 from astrbot.api import logger
 
+from .cache import ResultCache, URLCache
+from .charset import decode_html
+from .discuz import extract_formhash, parse_threadlist, search_page_count, search_page_url
+from .health import MirrorHealth
+from .index import ThreadIndex
+from .metrics import Metrics
+from .nav import (
+    A_HREF, DYBZ_LINK, HREF_ATTR, JS_REDIRECT, META_REFRESH, SIS_LINK, SSB_LINK_TAG, UAA_LATEST_LI,
+    scan_stream,
+)
+from .race import first_success
+from .scheduler import NoLaneAvailableError, QueueFullError, SearchScheduler, Ticket
+from .storage import append_jsonl, read_json, write_json_atomic
+
+class SearchError(Exception):
+    """搜索失败，异常信息即回复给用户的提示"""
+
+
+class AccountUnavailableError(SearchError):
+    """账号触发验证码或登录失败，需要暂停使用该账号"""
+
+
+class SiteUnavailableError(SearchError):
+    """站点网址无法解析，站点可能已下线"""
+
+
+class SearchResult(NamedTuple):
+    """一次搜索的结果：第一页立即返回，其余页在后台获取"""
+    results: List[dict]
+    more: Optional[asyncio.Future] = None  # 后续页的结果，不需要翻页时为 None
+
+
 @register(
     "astrbot_plugin_soushuba",
     "Foolllll",
@@ -22,6 +56,19 @@ from astrbot.api import logger
     "https://github.com/Foolllll-J/astrbot_plugin_soushuba",
 )
 class SoushuBaLinkExtractorPlugin(Star):
+    SESSION_LIMIT_PER_HOST = 8
+    SESSION_DNS_CACHE_TTL = 300
+    SESSION_KEEPALIVE_TIMEOUT = 60
+    MAX_NAV_REDIRECTS = 5
+    REDIRECT_MEMO_TTL = 6 * 3600
+    SEARCH_PAGE_CONCURRENCY = 3
+    # 导航页只给出域名，访问尚香书苑时使用的协议
+    SXSY_SCHEME = "https"
+    NAV_TIMEOUT = 20
+    MIRROR_HEALTH_SAVE_INTERVAL = 60
+    # 尚香书苑 Cookie 被判定失效后，在此时长（秒）内的搜索直接提示更新，之后放行搜索重新确认
+    SXSY_COOKIE_RECHECK = 300
+
     def __init__(self, context: Context, config=None):
         super().__init__(context)
         self.target_domains: List[str] = [
@@ -30,115 +77,476 @@ class SoushuBaLinkExtractorPlugin(Star):
             "https://soushu2030.com",
             "https://soushu2035.com",
         ]
+        self.sxsy_navs: List[str] = ["https://sxsy.org/"]
+        self.sis_navs: List[str] = ["http://sis001dz.org/", "http://www.sis001home.com/"]
+        self.dybz_navs: List[str] = ["https://www.龙腾小说.com/", "http://01bz.cc/"]
+        self.uaa_navs: List[str] = ["https://uaadizhi.com/"]
         self.plugin_config = config
         self.search_result_count = config.get("search_result_count", 10)
+        self.nav_hedge_delay = config.get("nav_hedge_delay", 0)
+        self.federated_timeout = config.get("federated_timeout", 30)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
         self.data_dir = StarTools.get_data_dir("astrbot_plugin_soushuba")
         os.makedirs(self.data_dir, exist_ok=True)
+        self.metrics_file = os.path.join(self.data_dir, "metrics.jsonl")
+        self.metrics = Metrics(
+            config.get("metrics_export", False),
+            on_export=lambda records: self._spawn(self._export_metrics(records)),
+        )
         self.ssb_cookie_file = os.path.join(self.data_dir, "ssb_cookies.json")
-        self.last_ssb_search_time = 0
+        self._ssb_cookie_store: Dict[str, dict] = read_json(self.ssb_cookie_file, {})
+        self._ssb_verified_at: Dict[str, float] = {}
+        self._formhashes: Dict[str, str] = {}
+        self.ssb_login_check_interval = config.get("ssb_login_check_interval", 600)
+        # 账号 -> 密码，每个账号各自持有会话与 Cookie，并作为调度器的一个通道
+        self.ssb_accounts: Dict[str, str] = self._parse_ssb_accounts(config.get("ssb_auth", ""))
+        self.ssb_account_cooldown = config.get("ssb_account_cooldown", 1800)
+        self.ssb_scheduler = SearchScheduler(
+            config.get("ssb_search_interval", 40),
+            config.get("search_queue_max", 10),
+            lanes=list(self.ssb_accounts) or [""],
+        )
+        self.sxsy_scheduler = SearchScheduler(
+            config.get("sxsy_search_interval", 0),
+            config.get("search_queue_max", 10),
+        )
+
+        self.url_cache = URLCache(config.get("url_cache_ttl", 3600))
+        self.url_cache_file = None
+        if config.get("url_cache_persist", True):
+            self.url_cache_file = os.path.join(self.data_dir, "site_urls.json")
+            self.url_cache.load(read_json(self.url_cache_file))
+        self._url_refreshing: Dict[str, asyncio.Task] = {}
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._host_encodings: Dict[str, str] = {}
+        # 导航入口 -> (落地页, 过期时间)
+        self._redirect_memo: Dict[str, tuple] = {}
+
+        self.mirror_health = MirrorHealth(
+            config.get("mirror_failure_threshold", 3),
+            config.get("mirror_cooldown", 600),
+        )
+        self.mirror_health_file = os.path.join(self.data_dir, "mirror_health.json")
+        self.mirror_health.load(read_json(self.mirror_health_file))
+        self._mirror_health_saved_at = 0.0
+
+        self.result_cache = ResultCache(
+            config.get("result_cache_size", 200),
+            config.get("result_cache_ttl", 1800),
+        )
+        self.result_cache_file = None
+        if config.get("result_cache_persist", True):
+            self.result_cache_file = os.path.join(self.data_dir, "search_cache.json")
+            self.result_cache.load(read_json(self.result_cache_file))
+        self._background_tasks = set()
+        self._pending_writes = set()
+
+        self.thread_index: Optional[ThreadIndex] = None
+        if config.get("thread_index_enabled", True):
+            try:
+                self.thread_index = ThreadIndex(os.path.join(self.data_dir, "threads.db"))
+            except Exception as e:
+                logger.error(f"[本地索引] 打开失败: {e}")
+
+        # 被判定失效的尚香书苑 Cookie 及判定时间，配置更新后自动不再匹配
+        self._sxsy_expired_cookie: Optional[str] = None
+        self._sxsy_expired_at = 0.0
+        self.prewarm_interval = config.get("prewarm_interval", 0)
+        if self.prewarm_interval > 0:
+            self._spawn(self._prewarm_loop())
+
+    def _get_session(self, key: str) -> aiohttp.ClientSession:
+        """获取插件生命周期内共享的会话。
+
+        每个站点（搜书吧按账号）各自持有连接池与 Cookie，复用 keep-alive 连接和 DNS 缓存，
+        在 terminate() 中统一关闭。
+        """
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.SESSION_LIMIT_PER_HOST,
+                ttl_dns_cache=self.SESSION_DNS_CACHE_TTL,
+                keepalive_timeout=self.SESSION_KEEPALIVE_TIMEOUT,
+            )
+            session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True))
+            self._sessions[key] = session
+        return session
+
+    def _count_response(self, response: aiohttp.ClientResponse, body: bytes):
+        """按站点累计请求数与读取的字节数"""
+        host = response.url.host or ""
+        self.metrics.incr("requests", host)
+        self.metrics.incr("bytes", host, len(body))
+
+    async def _read_body(self, response: aiohttp.ClientResponse) -> bytes:
+        body = await response.read()
+        self._count_response(response, body)
+        return body
+
+    async def _scan_body(self, response: aiohttp.ClientResponse, patterns):
+        """scan_stream 的计数版本，编码提示取该站点上次实际使用的编码"""
+        index, match, body = await scan_stream(response, patterns, self._stream_charset(response))
+        self._count_response(response, body)
+        return index, match, body
 
     async def _get_text(self, response: aiohttp.ClientResponse) -> str:
         """获取响应内容并处理编码问题"""
-        content = await response.read()
-        
-        charset = response.charset
-        if charset:
-            try:
-                return content.decode(charset)
-            except:
-                pass
-        
-        for encoding in ['utf-8', 'gbk', 'gb2312', 'big5']:
-            try:
-                return content.decode(encoding)
-            except UnicodeDecodeError:
-                continue
-        
-        return content.decode('utf-8', errors='ignore')
+        content = await self._read_body(response)
+        host = response.url.host
+        with self.metrics.span("decode", host or ""):
+            return self._decode_body(content, response.charset, host)
+
+    def _decode_body(self, content: bytes, charset: Optional[str], host: Optional[str] = None) -> str:
+        """按声明编码解码，并记住每个站点实际使用的编码，之后同站点的响应通常只需解码一次"""
+        text, encoding = decode_html(content, charset, self._host_encodings.get(host))
+        if host and encoding:
+            self._host_encodings[host] = encoding
+        return text
+
+    def _stream_charset(self, response: aiohttp.ClientResponse) -> Optional[str]:
+        return self._host_encodings.get(response.url.host)
 
     async def _extract_link_from_url(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
-        """尝试访问URL并提取指定链接。成功则返回链接，失败返回 None。"""
+        """尝试访问URL并提取指定链接。成功则返回链接，失败返回 None。
+
+        已知的跳转链会直接访问上次的落地页，落地页失效时再从入口重新跟随跳转。
+        """
+        memo = self._redirect_memo.get(url)
+        if memo:
+            landing_url, expires_at = memo
+            if expires_at > time.time():
+                link_url = await self._follow_nav_redirects(session, landing_url, entry_url=url)
+                if link_url:
+                    return link_url
+            self._redirect_memo.pop(url, None)
+        return await self._follow_nav_redirects(session, url, entry_url=url)
+
+    async def _follow_nav_redirects(self, session: aiohttp.ClientSession, url: str, entry_url: Optional[str] = None) -> Optional[str]:
+        """从 url 开始跟随 JS / meta 跳转直到找到链接，限制跳转次数并检测循环"""
+        visited = set()
+        for _ in range(self.MAX_NAV_REDIRECTS + 1):
+            if url in visited:
+                logger.warning(f"导航页跳转出现循环: {url}")
+                return None
+            visited.add(url)
+
+            link_url, redirect_url, final_url = await self._fetch_nav_page(session, url)
+            if not redirect_url:
+                if link_url and entry_url and final_url != entry_url:
+                    self._redirect_memo[entry_url] = (final_url, time.time() + self.REDIRECT_MEMO_TTL)
+                return link_url
+            url = redirect_url
+
+        logger.warning(f"导航页跳转超过 {self.MAX_NAV_REDIRECTS} 次: {entry_url or url}")
+        return None
+
+    async def _fetch_nav_page(self, session: aiohttp.ClientSession, url: str):
+        """访问一个导航页，返回 (链接, 跳转目标, 最终 URL)。
+
+        响应边接收边扫描跳转与目标链接，命中即停止读取；未命中时才对整页做 DOM 解析。
+        """
+        final_url = url
         try:
             ssl_verify = False if url.startswith("https://") else True
-            
+
             async with session.get(url, timeout=20, ssl=ssl_verify) as response:
                 final_url = str(response.url)
-                html_content = await self._get_text(response)
-            
-            js_redirect_match = re.search(r"window\.location\.href\s*=\s*['\"](.*?)['\"];", html_content)
-            if js_redirect_match:
-                redirect_target_url = urljoin(final_url, js_redirect_match.group(1))
-                return await self._extract_link_from_url(session, redirect_target_url)
-
-            meta_refresh_match = re.search(r"<meta http-equiv=\"refresh\" content=\"[\d\.]*;\s*url=(.*?)\"", html_content, re.IGNORECASE)
-            if meta_refresh_match:
-                redirect_target_url = urljoin(final_url, meta_refresh_match.group(1))
-                return await self._extract_link_from_url(session, redirect_target_url)
-
-            soup = BeautifulSoup(html_content, 'lxml') 
-            link_element = soup.select_one('a.link') 
-            if not link_element:
-                link_element = soup.find('a', string='搜书吧')
-            if not link_element:
-                link_element = soup.find('a')
+                charset = response.charset
+                host = response.url.host
+                _, match, body = await self._scan_body(response, [JS_REDIRECT, META_REFRESH, SSB_LINK_TAG])
+
+            if match and match.re is not SSB_LINK_TAG:
+                return None, urljoin(final_url, match.group(1)), final_url
+
+            if match:
+                href_match = HREF_ATTR.search(match.group(0))
+                if href_match:
+                    return urljoin(final_url, unescape(href_match.group(1))), None, final_url
+
+            html_content = self._decode_body(body, charset, host)
+            with self.metrics.span("nav_parse", host or ""):
+                soup = BeautifulSoup(html_content, 'lxml')
+                link_element = soup.select_one('a.link')
+                if not link_element:
+                    link_element = soup.find('a', string='搜书吧')
+                if not link_element:
+                    link_element = soup.find('a')
 
             if link_element and link_element.has_attr('href'):
                 link_url = link_element['href']
                 if not link_url.startswith(('http://', 'https://')):
                     link_url = urljoin(final_url, link_url)
-                return link_url
+                return link_url, None, final_url
+
+        except Exception as e:
+            logger.error(f"访问 {url} 失败: {e}")
+        return None, None, final_url
+
+    async def _extract_sis_link(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        """从第一会所导航页提取最新网址"""
+        try:
+            async with session.get(url, headers=self.headers, timeout=10) as response:
+                if response.status == 200:
+                    _, match, body = await self._scan_body(response, [SIS_LINK])
+                    if match:
+                        return unescape(match.group(1))
+                    soup = BeautifulSoup(self._decode_body(body, response.charset, response.url.host), 'lxml')
+                    link_element = soup.find('a', string=re.compile(r'地址一'))
+                    if link_element and link_element.has_attr('href'):
+                        return link_element['href']
+        except Exception as e:
+            logger.error(f"访问 {url} 失败: {e}")
+        return None
 
-        except Exception as e: 
+    async def _extract_dybz_link(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        """从第一版主导航页提取最新网址"""
+        try:
+            async with session.get(url, headers=self.headers, timeout=10) as response:
+                if response.status == 200:
+                    _, match, body = await self._scan_body(response, [DYBZ_LINK])
+                    if match:
+                        return unescape(match.group(1))
+                    soup = BeautifulSoup(self._decode_body(body, response.charset, response.url.host), 'lxml')
+                    link_element = soup.find('a', string=re.compile(r'最新线路\s*1'))
+                    if link_element and link_element.has_attr('href'):
+                        return link_element['href']
+        except Exception as e:
+            logger.error(f"访问 {url} 失败: {e}")
+        return None
+
+    async def _extract_uaa_link(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        """从有爱爱导航页提取最新网址"""
+        try:
+            async with session.get(url, headers=self.headers, timeout=10) as response:
+                if response.status == 200:
+                    _, match, body = await self._scan_body(response, [UAA_LATEST_LI])
+                    a_match = A_HREF.search(match.group(0)) if match else None
+                    if a_match:
+                        return unescape(a_match.group(1))
+                    soup = BeautifulSoup(self._decode_body(body, response.charset, response.url.host), 'lxml')
+                    for li in soup.find_all('li'):
+                        span = li.find('span')
+                        if span and '最新' in span.get_text():
+                            a_tag = li.find('a')
+                            if a_tag and a_tag.has_attr('href'):
+                                return a_tag['href']
+        except Exception as e:
             logger.error(f"访问 {url} 失败: {e}")
         return None
 
+    async def _extract_sxsy_host(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        """从尚香书苑导航页提取最新域名"""
+        try:
+            async with session.get(url, headers=self.headers, timeout=10, ssl=False) as response:
+                if response.status == 200:
+                    text = await self._get_text(response)
+                    match = re.search(r'href="https://([^"]+)"', text)
+                    if match:
+                        return match.group(1)
+        except Exception as e:
+            logger.error(f"[获取sxsy host] 错误: {e}")
+        return None
+
+    async def _race_navs(self, session: aiohttp.ClientSession, urls: List[str], extractor) -> Optional[str]:
+        """并发访问所有导航站，返回最先提取到的链接，其余请求随即取消。
+
+        候选按镜像健康度排序并跳过熔断中的镜像，对冲模式下健康的镜像会先被请求。
+        """
+        candidates = self.mirror_health.order(urls)
+        link_url = await first_success(
+            [lambda url=url: self._probe_mirror(session, url, extractor) for url in candidates],
+            hedge_delay=self.nav_hedge_delay,
+        )
+        self._save_mirror_health()
+        return link_url
+
+    async def _probe_mirror(self, session: aiohttp.ClientSession, url: str, extractor) -> Optional[str]:
+        """访问单个镜像并记录成败与耗时；竞速中被取消的请求不计入统计"""
+        timeout = self.mirror_health.timeout_for(url, self.NAV_TIMEOUT)
+        start = time.monotonic()
+        try:
+            link_url = await asyncio.wait_for(extractor(session, url), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"访问 {url} 超时（{timeout:.1f} 秒）")
+            link_url = None
+        except Exception as e:
+            logger.error(f"访问 {url} 失败: {e}")
+            link_url = None
+        elapsed = time.monotonic() - start
+        self.mirror_health.record(url, link_url is not None, elapsed)
+        self.metrics.observe("mirror", url, elapsed, ok=link_url is not None)
+        return link_url
+
+    def _save_mirror_health(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._mirror_health_saved_at < self.MIRROR_HEALTH_SAVE_INTERVAL:
+            return
+        self._mirror_health_saved_at = now
+        self._spawn(self._persist_mirror_health())
+
+    async def _persist_mirror_health(self):
+        try:
+            await write_json_atomic(self.mirror_health_file, self.mirror_health.dump())
+        except Exception as e:
+            logger.error(f"保存镜像健康状态失败: {e}")
+
+    async def _resolve_ssb_url(self) -> Optional[str]:
+        session = self._get_session("ssb_nav")
+        return await self._race_navs(session, self.target_domains, self._extract_link_from_url)
+
+    async def _resolve_sxsy_host(self) -> Optional[str]:
+        session = self._get_session("sxsy")
+        return await self._race_navs(session, self.sxsy_navs, self._extract_sxsy_host)
+
+    async def _resolve_sis_url(self) -> Optional[str]:
+        session = self._get_session("sis")
+        return await self._race_navs(session, self.sis_navs, self._extract_sis_link)
+
+    async def _resolve_dybz_url(self) -> Optional[str]:
+        session = self._get_session("01bz")
+        return await self._race_navs(session, self.dybz_navs, self._extract_dybz_link)
+
+    async def _resolve_uaa_url(self) -> Optional[str]:
+        session = self._get_session("uaa")
+        return await self._race_navs(session, self.uaa_navs, self._extract_uaa_link)
+
+    async def _get_site_url(self, site: str, resolver) -> Optional[str]:
+        """获取站点最新网址。命中缓存立即返回，缓存过期时在后台重新解析"""
+        url, stale = self.url_cache.get(site)
+        self.metrics.incr("url_cache_hit" if url else "url_cache_miss", site)
+        if url:
+            if stale:
+                self._refresh_site_url(site, resolver)
+            return url
+        # 同一站点的并发解析共用一个任务，shield 防止调用方取消时连带中断解析
+        return await asyncio.shield(self._refresh_site_url(site, resolver))
+
+    def _refresh_site_url(self, site: str, resolver) -> asyncio.Task:
+        task = self._url_refreshing.get(site)
+        if task is None:
+            task = asyncio.create_task(self._resolve_site_url(site, resolver))
+            self._url_refreshing[site] = task
+            task.add_done_callback(lambda _: self._url_refreshing.pop(site, None))
+        return task
+
+    async def _resolve_site_url(self, site: str, resolver) -> Optional[str]:
+        start = time.perf_counter()
+        url = await resolver()
+        self.metrics.observe("nav", site, time.perf_counter() - start, ok=bool(url))
+        if url:
+            self.url_cache.set(site, url)
+            if self.url_cache_file:
+                try:
+                    await write_json_atomic(self.url_cache_file, self.url_cache.dump())
+                except Exception as e:
+                    logger.error(f"保存网址缓存失败: {e}")
+        return url
+
+    def _spawn(self, coro) -> asyncio.Task:
+        """启动后台任务并持有引用，插件卸载时统一取消"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    def _spawn_write(self, coro) -> asyncio.Task:
+        """启动落盘任务并持有引用，插件卸载时等待其完成而不是取消，避免丢失最后一次写入"""
+        task = asyncio.create_task(coro)
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+        return task
+
+    async def _save_result_cache(self):
+        try:
+            await write_json_atomic(self.result_cache_file, self.result_cache.dump())
+        except Exception as e:
+            logger.error(f"保存搜索结果缓存失败: {e}")
+
+    def _cache_results(self, key: str, results: List[dict]):
+        self.result_cache.set(key, results)
+        if self.result_cache_file:
+            self._spawn_write(self._save_result_cache())
+
+    def _format_results(self, keyword: str, results: List[dict], start: int = 1, cached: bool = False) -> str:
+        lines = [
+            f"【{i}】{r['title']}\n📅 时间: {r['time']}\n🔗 {r['link']}"
+            + (f"\n🏷 来源: {'、'.join(r['sources'])}" if r.get("sources") else "")
+            for i, r in enumerate(results, start)
+        ]
+        if cached:
+            return f"📦 以下为本地索引中关于 “{keyword}” 的缓存结果，可能不是最新：\n\n" + "\n\n".join(lines)
+        if start > 1:
+            return f"📄 “{keyword}” 的更多结果：\n\n" + "\n\n".join(lines)
+        return f"✅ 为您找到以下关于 “{keyword}” 的结果：\n\n" + "\n\n".join(lines)
+
+    async def _reply_results(self, event: AstrMessageEvent, keyword: str, cache_key: str, result: SearchResult):
+        """先发送第一页结果，后续页获取完成后再追加发送，全部结果写入缓存"""
+        if result.more is None:
+            yield event.plain_result(self._format_results(keyword, result.results))
+            self._cache_results(cache_key, result.results)
+            return
+
+        yield event.plain_result(self._format_results(keyword, result.results) + "\n\n⏳ 更多结果加载中...")
+        try:
+            more = await asyncio.shield(result.more)
+        except Exception as e:
+            logger.error(f"[搜索翻页] 出错: {e}")
+            yield event.plain_result(f"⚠️ “{keyword}” 的后续页获取失败，仅有以上结果。")
+            more = []
+        else:
+            if more:
+                yield event.plain_result(self._format_results(keyword, more, start=len(result.results) + 1))
+            else:
+                yield event.plain_result(f"📄 “{keyword}” 没有更多结果了。")
+        self._cache_results(cache_key, result.results + more)
+
+    async def _all_pages(self, future: asyncio.Future) -> List[dict]:
+        """等待第一页与后续页，返回全部结果；后续页获取失败时只返回第一页"""
+        result = await asyncio.shield(future)
+        if result.more is None:
+            return result.results
+        try:
+            return result.results + await asyncio.shield(result.more)
+        except Exception as e:
+            logger.error(f"[搜索翻页] 出错: {e}")
+            return result.results
+
     def _load_ssb_cookies(self, username: str) -> dict:
-        if os.path.exists(self.ssb_cookie_file):
-            try:
-                with open(self.ssb_cookie_file, "r", encoding="utf-8") as f:
-                    all_cookies = json.load(f)
-                    data = all_cookies.get(username, {})
-                    return data.get("cookies", {})
-            except Exception as e:
-                logger.error(f"加载 SSB Cookie 失败: {e}")
-        return {}
+        data = self._ssb_cookie_store.get(username, {})
+        return data.get("cookies", {})
 
     def _save_ssb_cookies(self, username: str, cookies: dict):
+        self._ssb_cookie_store[username] = {
+            "cookies": cookies,
+            "update_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self._spawn_write(self._persist_ssb_cookies(username))
+
+    async def _persist_ssb_cookies(self, username: str):
         try:
-            all_cookies = {}
-            if os.path.exists(self.ssb_cookie_file):
-                with open(self.ssb_cookie_file, "r", encoding="utf-8") as f:
-                    try:
-                        all_cookies = json.load(f)
-                    except: pass
-            all_cookies[username] = {
-                "cookies": cookies,
-                "update_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            with open(self.ssb_cookie_file, "w", encoding="utf-8") as f:
-                json.dump(all_cookies, f, ensure_ascii=False, indent=2)
+            await write_json_atomic(self.ssb_cookie_file, self._ssb_cookie_store)
             logger.info(f"[SSB] 账号 {username} 的 Cookie 已保存")
         except Exception as e:
             logger.error(f"保存 SSB Cookie 失败: {e}")
 
     async def _ssb_login(self, session, base_url: str, username, password):
-        """参考 ssb.py 的登录逻辑"""
+        """参考 ssb.py 的登录逻辑。
+
+        仅在登录后校验不到用户名（账密被拒绝）时返回 False；网络异常原样抛出，
+        登录页异常抛出 SearchError，二者都不应让账号暂停使用。
+        """
         try:
             logger.info(f"[SSB 登录] 开始登录流程: {username} @ {base_url}")
-            # 1. 获取 formhash
+            # 1. 获取 formhash（游客 formhash 与会话无关，可复用缓存）
             login_url = urljoin(base_url, "member.php?mod=logging&action=login")
-            async with session.get(login_url, headers=self.headers, timeout=15, ssl=False) as resp:
-                html = await self._get_text(resp)
-                soup = BeautifulSoup(html, "lxml")
-                formhash_el = soup.find("input", {"name": "formhash"})
-                if not formhash_el: 
-                    logger.error("[SSB 登录] 无法在登录页面获取 formhash")
-                    return False
-                formhash = formhash_el["value"]
-                logger.info(f"[SSB 登录] 获取到 formhash: {formhash}")
+            guest_key = f"ssb:@{urlparse(base_url).netloc}"
+            formhash = await self._get_formhash(session, guest_key, login_url, self.headers, timeout=15)
+            if not formhash:
+                logger.error("[SSB 登录] 无法在登录页面获取 formhash")
+                raise SearchError(" 无法打开搜书吧登录页面，请稍后再试。")
+            logger.info(f"[SSB 登录] 获取到 formhash: {formhash}")
 
             # 2. 提交登录
             login_post_url = urljoin(base_url, "member.php?mod=logging&action=login&loginsubmit=yes&infloat=yes&lssubmit=yes&inajax=1")
@@ -151,7 +559,7 @@ class SoushuBaLinkExtractorPlugin(Star):
             }
             logger.info(f"[SSB 登录] 提交登录请求...")
             async with session.post(login_post_url, data=login_data, headers=self.headers, timeout=15, ssl=False) as resp:
-                await resp.read() # 确保读取
+                await self._read_body(resp) # 确保读取
 
             # 3. 校验登录状态
             check_url = urljoin(base_url, "home.php?mod=spacecp")
@@ -162,97 +570,139 @@ class SoushuBaLinkExtractorPlugin(Star):
                     logger.info(f"[SSB 登录] 登录验证成功: {username}")
                     cookies = {c.key: c.value for c in session.cookie_jar}
                     self._save_ssb_cookies(username, cookies)
+                    self._ssb_verified_at[username] = time.time()
+                    # 会话已变化，旧的用户 formhash 作废
+                    self._formhashes.pop(self._ssb_formhash_key(username, base_url), None)
                     return True
                 else:
+                    self._formhashes.pop(guest_key, None)
                     logger.error(f"[SSB 登录] 登录验证失败。URL: {final_url}, 用户名是否存在: {username in html}")
-        except Exception as e:
-            logger.error(f"[SSB 登录] 异常: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"[SSB 登录] 网络异常: {e}")
+            raise
         return False
 
-    @filter.command("ssb", alias={'搜书吧'})
-    async def ssb_command(self, event: AstrMessageEvent):
-        """获取搜书吧的网址或搜索书籍"""
-        args = event.message_str.strip().split(maxsplit=1)
-        if len(args) < 2:
-            # 获取网址逻辑
-            async with aiohttp.ClientSession() as session:
-                for domain_url in self.target_domains:
-                    link_url = await self._extract_link_from_url(session, domain_url)
-                    if link_url:
-                        yield event.plain_result(f"📖 成功找到搜书吧最新网址：\n{link_url}")
-                        return
-            yield event.plain_result("❌ 抱歉，所有导航网站均无法访问或未找到可用链接。")
-            return
+    async def _get_formhash(self, session: aiohttp.ClientSession, key: str, url: str, headers: dict, timeout: int = 10) -> str:
+        """获取 Discuz 表单的 formhash。
 
-        # 搜索逻辑
-        keyword = args[1]
-        
-        # 40秒搜索限制
-        current_time = time.time()
-        if current_time - self.last_ssb_search_time < 40:
-            yield event.plain_result("搜书吧在 40 秒内只能进行一次搜索")
+        formhash 在同一登录会话内保持不变，按 (站点, 账号会话) 缓存，
+        仅在缓存缺失、提交被拒绝或会话变化时重新请求页面提取。
+        """
+        site = key.split("@", 1)[0].split(":", 1)[0]
+        formhash = self._formhashes.get(key)
+        self.metrics.incr("formhash_cache_hit" if formhash else "formhash_cache_miss", site)
+        if formhash:
+            return formhash
+        with self.metrics.span("formhash", site):
+            async with session.get(url, headers=headers, timeout=timeout, ssl=False) as resp:
+                html = await self._get_text(resp)
+        formhash = extract_formhash(html)
+        if formhash:
+            self._formhashes[key] = formhash
+        return formhash
+
+    @staticmethod
+    def _formhash_rejected(html: str) -> bool:
+        return "表单验证串不符" in html or "请求来路不正确" in html
+
+    @staticmethod
+    def _ssb_formhash_key(username: str, base_url: str) -> str:
+        return f"ssb:{username}@{urlparse(base_url).netloc}"
+
+    @staticmethod
+    def _ssb_logged_out(html: str) -> bool:
+        """页面是否为未登录状态（已登录页面带有退出链接）"""
+        return "action=logout" not in html and ("mod=logging&action=login" in html or "先登录" in html)
+
+    async def _ssb_ensure_login(self, session: aiohttp.ClientSession, base_url: str, username: str, password: str):
+        """确认账号处于登录状态。
+
+        距上次确认未超过 ssb_login_check_interval 时直接信任会话，
+        否则请求个人设置页校验，失效则重新登录；账密被拒绝时抛出 AccountUnavailableError，
+        网络异常原样抛出，由调用方按站点故障处理。
+        """
+        # 共享会话中已有 Cookie 时无需再从存储加载
+        if len(session.cookie_jar) == 0:
+            cookies = self._load_ssb_cookies(username)
+            if cookies:
+                session.cookie_jar.update_cookies(cookies)
+                logger.info(f"[SSB 搜索] 已加载账号 {username} 的历史 Cookie")
+
+        verified_at = self._ssb_verified_at.get(username)
+        if verified_at and time.time() - verified_at < self.ssb_login_check_interval:
             return
-        
-        ssb_auth = self.plugin_config.get("ssb_auth", "")
-        if not ssb_auth or "&" not in ssb_auth:
-            yield event.plain_result(" 请先在插件配置中设置 ssb_auth (格式: 账号&密码)。")
+
+        check_url = urljoin(base_url, "home.php?mod=spacecp")
+        with self.metrics.span("login_check", "ssb"):
+            async with session.get(check_url, headers=self.headers, timeout=10, ssl=False) as resp:
+                final_url = str(resp.url)
+                html = await self._get_text(resp)
+        if "登录" not in final_url and username in html:
+            logger.info(f"[SSB 搜索] Cookie 验证有效: {username}")
+            self._ssb_verified_at[username] = time.time()
             return
-        
-        self.last_ssb_search_time = current_time # 更新上次搜索时间
-        username, password = ssb_auth.split("&", 1)
-        yield event.plain_result(f"🔍 正在搜书吧搜索: {keyword}...")
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                # 1. 获取最新 base_url
-                base_url = None
-                for domain_url in self.target_domains:
-                    base_url = await self._extract_link_from_url(session, domain_url)
-                    if base_url: break
-                
-                if not base_url:
-                    yield event.plain_result(" 无法获取搜书吧最新网址，请稍后再试。")
-                    return
-                
-                parsed = urlparse(base_url)
-                base_url = f"{parsed.scheme}://{parsed.netloc}/"
-                logger.info(f"[SSB 搜索] 使用 Base URL: {base_url}")
-
-                # 2. 加载 Cookie 并校验
-                cookies = self._load_ssb_cookies(username)
-                if cookies:
-                    session.cookie_jar.update_cookies(cookies)
-                    logger.info(f"[SSB 搜索] 已加载账号 {username} 的历史 Cookie")
-                
-                # 校验登录状态
-                check_url = urljoin(base_url, "home.php?mod=spacecp")
-                is_logged_in = False
-                try:
-                    async with session.get(check_url, headers=self.headers, timeout=10, ssl=False) as resp:
-                        final_url = str(resp.url)
-                        html = await self._get_text(resp)
-                        if "登录" not in final_url and username in html:
-                            is_logged_in = True
-                            logger.info(f"[SSB 搜索] Cookie 验证有效: {username}")
-                except Exception as e: 
-                    logger.warning(f"[SSB 搜索] Cookie 验证异常: {e}")
-
-                if not is_logged_in:
-                    logger.info(f"[SSB 搜索] Cookie 失效或未登录，尝试登录: {username}")
-                    if not await self._ssb_login(session, base_url, username, password):
-                        yield event.plain_result(" 搜书吧登录失败，请检查账密配置。")
-                        return
-
-                # 3. 搜索
-                search_url = urljoin(base_url, "search.php?mod=forum")
-                
+        logger.info(f"[SSB 搜索] Cookie 失效或未登录，尝试登录: {username}")
+        with self.metrics.span("login", "ssb"):
+            if not await self._ssb_login(session, base_url, username, password):
+                raise AccountUnavailableError(" 搜书吧登录失败，请检查账密配置。")
+
+    @staticmethod
+    def _parse_ssb_accounts(ssb_auth: str) -> Dict[str, str]:
+        """解析 ssb_auth 配置，多个 账号&密码 之间用换行或分号分隔"""
+        accounts = {}
+        for entry in re.split(r"[;\n]", ssb_auth or ""):
+            entry = entry.strip()
+            if "&" not in entry:
+                continue
+            username, password = entry.split("&", 1)
+            if username:
+                accounts[username] = password
+        return accounts
+
+    async def _ssb_account_search(self, keyword: str, username: str) -> SearchResult:
+        """用指定账号搜索；账号触发验证码或账密被拒绝时暂停使用该账号。
+
+        排队期间账号被暂停的搜索由调度器改排到其他账号，不会在这里请求站点。
+        """
+        try:
+            return await self._ssb_search(keyword, username, self.ssb_accounts[username])
+        except AccountUnavailableError:
+            self._cool_down_ssb_account(username)
+            raise
+
+    def _cool_down_ssb_account(self, username: str):
+        self.ssb_scheduler.cool_down(username, self.ssb_account_cooldown)
+        logger.warning(f"[SSB] 账号 {username} 暂停使用 {self.ssb_account_cooldown} 秒")
+
+    async def _ssb_base_url(self) -> Optional[str]:
+        """获取搜书吧最新网址并规范为站点根路径"""
+        base_url = await self._get_site_url("ssb", self._resolve_ssb_url)
+        if not base_url:
+            return None
+        parsed = urlparse(base_url)
+        return f"{parsed.scheme}://{parsed.netloc}/"
+
+    async def _ssb_search(self, keyword: str, username: str, password: str) -> SearchResult:
+        """登录搜书吧并执行一次搜索，返回结果记录；失败时抛出 SearchError"""
+        session = self._get_session(f"ssb:{username}")
+        try:
+            # 1. 获取最新 base_url
+            base_url = await self._ssb_base_url()
+
+            if not base_url:
+                raise SiteUnavailableError(" 无法获取搜书吧最新网址，请稍后再试。")
+            logger.info(f"[SSB 搜索] 使用 Base URL: {base_url}")
+
+            # 2. 确认登录状态
+            await self._ssb_ensure_login(session, base_url, username, password)
+
+            # 3. 搜索
+            search_url = urljoin(base_url, "search.php?mod=forum")
+            fh_key = self._ssb_formhash_key(username, base_url)
+            for attempt in range(2):
                 # 获取 formhash
-                formhash = ""
-                async with session.get(search_url, headers=self.headers, timeout=10, ssl=False) as resp:
-                    html = await self._get_text(resp)
-                    fh_match = re.search(r'name="formhash" value="([a-f0-9]+)"', html)
-                    if fh_match: formhash = fh_match.group(1)
-                
+                formhash = await self._get_formhash(session, fh_key, search_url, self.headers)
                 logger.info(f"[SSB 搜索] 获取搜索页 formhash: {formhash}")
 
                 search_params = {
@@ -262,54 +712,370 @@ class SoushuBaLinkExtractorPlugin(Star):
                     'formhash': formhash
                 }
                 encoded_data = urlencode(search_params, encoding='gbk')
-                
+
                 search_headers = self.headers.copy()
                 search_headers['Referer'] = search_url
                 search_headers['Content-Type'] = 'application/x-www-form-urlencoded'
-                
+
                 logger.info(f"[SSB 搜索] 发送搜索 POST 请求, 关键词: {keyword}")
-                async with session.post(search_url, data=encoded_data, headers=search_headers, timeout=15, ssl=False) as p_resp:
-                    html = await self._get_text(p_resp)
-                    final_search_url = str(p_resp.url)
-                    logger.info(f"[SSB 搜索] 搜索响应 URL: {final_search_url}, 长度: {len(html)}")
-
-                if "对不起，没有找到匹配结果。" in html:
-                    yield event.plain_result(f" 未找到与 {keyword} 相关的结果。")
-                    return
-
-                # 4. 解析结果
-                soup = BeautifulSoup(html, 'lxml')
-                items = soup.select('div#threadlist ul li.pbw')
-                logger.info(f"[SSB 搜索] 解析到 {len(items)} 条结果")
-
-                if not items:
-                    if "验证码" in html or "secqaa" in html:
-                        yield event.plain_result(" 搜索触发了验证码，请稍后再试。")
-                    else:
-                        yield event.plain_result(" 无法获取搜索结果，可能是被拦截或解析失败。")
-                    return
-
-                results = []
-                for i, item in enumerate(items[:self.search_result_count], 1):
-                    title_el = item.select_one('h3.xs3 a')
-                    if not title_el: continue
-                    
-                    title = "".join(title_el.find_all(string=True, recursive=True)).strip()
-                    link = urljoin(base_url, title_el['href'])
-                    
-                    time_text = "未知"
-                    time_span = item.select_one('p span')
-                    if time_span:
-                        time_text = time_span.get_text(strip=True)
-                    
-                    results.append(f"【{i}】{title}\n📅 时间: {time_text}\n🔗 {link}")
-
-                reply = f"✅ 为您找到以下关于 “{keyword}” 的结果：\n\n" + "\n\n".join(results)
-                yield event.plain_result(reply)
+                with self.metrics.span("search_post", "ssb"):
+                    async with session.post(search_url, data=encoded_data, headers=search_headers, timeout=15, ssl=False) as p_resp:
+                        html = await self._get_text(p_resp)
+                        final_search_url = str(p_resp.url)
+                logger.info(f"[SSB 搜索] 搜索响应 URL: {final_search_url}, 长度: {len(html)}")
+
+                if attempt == 0 and self._ssb_logged_out(html):
+                    # 登录状态在校验间隔内失效，重新登录后再搜索一次
+                    logger.info(f"[SSB 搜索] 搜索页显示未登录，重新登录: {username}")
+                    self._ssb_verified_at.pop(username, None)
+                    self._formhashes.pop(fh_key, None)
+                    await self._ssb_ensure_login(session, base_url, username, password)
+                    continue
+                if attempt == 0 and self._formhash_rejected(html):
+                    logger.info("[SSB 搜索] formhash 已失效，重新获取后重试")
+                    self._formhashes.pop(fh_key, None)
+                    continue
+                break
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # 缓存的网址可能已失效，下次搜索重新解析
+            self.url_cache.invalidate("ssb")
+            raise
+
+        if "对不起，没有找到匹配结果。" in html:
+            return SearchResult([])
 
+        # 4. 解析结果
+        with self.metrics.span("parse", "ssb"):
+            results = await asyncio.to_thread(parse_threadlist, html, base_url, self.search_result_count)
+        logger.info(f"[SSB 搜索] 解析到 {len(results)} 条结果")
+
+        if not results:
+            if "验证码" in html or "secqaa" in html:
+                raise AccountUnavailableError(" 搜索触发了验证码，请稍后再试。")
+            raise SearchError(" 无法获取搜索结果，可能是被拦截或解析失败。")
+        return self._paginate("ssb", session, final_search_url, html, results, base_url, self.headers)
+
+    async def _sxsy_search(self, keyword: str, cookie: str) -> SearchResult:
+        """使用配置的 Cookie 在尚香书苑执行一次搜索，返回结果记录；失败时抛出 SearchError"""
+        session = self._get_session("sxsy")
+        try:
+            # 1. 获取最新 host
+            host = await self._get_site_url("sxsy", self._resolve_sxsy_host) or "sxsy87.com"
+
+            # 2. 准备 POST 请求
+            headers = self._sxsy_headers(host, cookie)
+            post_url = f"{self.SXSY_SCHEME}://{host}/search.php?mod=forum"
+
+            for attempt in range(2):
+                # 提取 formhash
+                formhash = ""
+                try:
+                    formhash = await self._get_formhash(session, f"sxsy@{host}", post_url, headers)
+                except: pass
+
+                post_data = {
+                    'mod': 'forum',
+                    'searchsubmit': 'yes',
+                    'srchtxt': keyword,
+                    'formhash': formhash
+                }
+
+                # 3. 发送 POST 搜索
+                logger.info(f"[sxsy 搜索] 尝试 POST 搜索: {post_url}")
+                with self.metrics.span("search_post", "sxsy"):
+                    async with session.post(post_url, data=post_data, headers=headers, timeout=15, ssl=False) as p_resp:
+                        html = await self._get_text(p_resp)
+                        final_search_url = str(p_resp.url)
+                logger.info(f"[sxsy 搜索] POST 响应 URL: {final_search_url}, 长度: {len(html)}")
+
+                if attempt == 0 and self._formhash_rejected(html):
+                    logger.info("[sxsy 搜索] formhash 已失效，重新获取后重试")
+                    self._formhashes.pop(f"sxsy@{host}", None)
+                    continue
+                break
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.url_cache.invalidate("sxsy")
+            raise
+
+        # 4. 检查异常状态
+        if self._sxsy_logged_out(html):
+            self._formhashes.pop(f"sxsy@{host}", None)
+            self._mark_sxsy_cookie_expired(cookie)
+            raise SearchError("❌ Cookie 已失效或未登录，请更新CK。")
+
+        # 搜索无结果特征：包含“对不起，没有找到匹配结果。”或者结果数为 0
+        if "对不起，没有找到匹配结果。" in html or "相关内容 0 个" in html:
+            return SearchResult([])
+
+        # 5. 解析结果
+        with self.metrics.span("parse", "sxsy"):
+            results = await asyncio.to_thread(parse_threadlist, html, f"{self.SXSY_SCHEME}://{host}/", self.search_result_count)
+        logger.info(f"[sxsy 搜索] 解析到 {len(results)} 条结果")
+
+        if not results:
+            raise SearchError("❌ 无法获取搜索结果，请检查 Cookie 是否过期。")
+        return self._paginate("sxsy", session, final_search_url, html, results, f"{self.SXSY_SCHEME}://{host}/", headers)
+
+    def _paginate(self, site: str, session: aiohttp.ClientSession, final_url: str, html: str,
+                  results: List[dict], base_url: str, headers: dict) -> SearchResult:
+        """第一页不足 search_result_count 条且还有后续页时，在后台开始获取后续页"""
+        self._index_results(site, results)
+        if len(results) >= self.search_result_count or search_page_count(html) <= 1:
+            return SearchResult(results)
+        if not search_page_url(final_url, html, 2):
+            return SearchResult(results)
+        more = self._spawn(self._fetch_more_pages(site, session, final_url, html, len(results), base_url, headers))
+        return SearchResult(results, more)
+
+    async def _fetch_more_pages(self, site: str, session: aiohttp.ClientSession, final_url: str, html: str,
+                                page_size: int, base_url: str, headers: dict) -> List[dict]:
+        """并发获取搜索结果的后续页（同时最多 SEARCH_PAGE_CONCURRENCY 个请求），按页码顺序返回补足的结果"""
+        needed = self.search_result_count - page_size
+        last_page = min(search_page_count(html), 1 + math.ceil(needed / page_size))
+        semaphore = asyncio.Semaphore(self.SEARCH_PAGE_CONCURRENCY)
+
+        async def fetch(page: int) -> List[dict]:
+            url = search_page_url(final_url, html, page)
+            async with semaphore:
+                try:
+                    with self.metrics.span("page", site):
+                        async with session.get(url, headers=headers, timeout=15, ssl=False) as resp:
+                            page_html = await self._get_text(resp)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"[搜索翻页] 获取第 {page} 页失败: {e}")
+                    return []
+            with self.metrics.span("parse", site):
+                return await asyncio.to_thread(parse_threadlist, page_html, base_url, needed)
+
+        pages = await asyncio.gather(*(fetch(page) for page in range(2, last_page + 1)))
+        results = [r for page_results in pages for r in page_results][:needed]
+        self._index_results(site, results)
+        return results
+
+    def _index_results(self, site: str, results: List[dict]):
+        if self.thread_index and results:
+            self.thread_index.add(site, results)
+            self._spawn(self._flush_thread_index())
+
+    async def _flush_thread_index(self):
+        try:
+            await self.thread_index.flush()
+        except Exception as e:
+            logger.error(f"[本地索引] 写入失败: {e}")
+
+    async def _offline_reply(self, site: str, keyword: str, reason: str) -> str:
+        """站点暂时无法搜索时查询本地索引，有结果则附在原因之后并标注为缓存结果"""
+        if not self.thread_index:
+            return reason
+        try:
+            results = await self.thread_index.search(site, keyword, self.search_result_count)
+        except Exception as e:
+            logger.error(f"[本地索引] 查询失败: {e}")
+            return reason
+        if not results:
+            return reason
+        self.metrics.incr("index_fallback", site)
+        return f"{reason}\n\n" + self._format_results(keyword, results, cached=True)
+
+    def _cached_results(self, site: str, keyword: str) -> tuple:
+        """返回 (结果缓存 key, 缓存的结果)，并统计缓存命中"""
+        cache_key = ResultCache.make_key(site, keyword, self.search_result_count)
+        cached = self.result_cache.get(cache_key)
+        self.metrics.incr("result_cache_hit" if cached else "result_cache_miss", site)
+        return cache_key, cached
+
+    async def _timed(self, stage: str, label: str, coro):
+        with self.metrics.span(stage, label):
+            return await coro
+
+    def _observe_queue(self, site: str, ticket: Ticket):
+        if not ticket.shared:
+            self.metrics.observe("queue_wait", site, ticket.wait)
+
+    async def _export_metrics(self, records: List[dict]):
+        try:
+            await append_jsonl(self.metrics_file, records)
+        except Exception as e:
+            logger.error(f"导出统计数据失败: {e}")
+
+    def _sxsy_headers(self, host: str, cookie: str) -> dict:
+        return {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36',
+            'Cookie': cookie,
+            'Referer': f"{self.SXSY_SCHEME}://{host}/search.php?mod=forum"
+        }
+
+    @staticmethod
+    def _sxsy_logged_out(html: str) -> bool:
+        # CK 失效特征：页面标题包含“登录”，或者 body 带有 pg_logging 类，或者包含特定的登录 action 链接
+        return '<title>登录 -  尚香书苑  </title>' in html or 'class="pg_logging"' in html or 'member.php?mod=logging&action=login' in html
+
+    def _mark_sxsy_cookie_expired(self, cookie: str):
+        if self._sxsy_expired_cookie != cookie:
+            logger.warning("[sxsy] Cookie 已失效或未登录，请在插件配置中更新 sxsy_cookie")
+        self._sxsy_expired_cookie = cookie
+        self._sxsy_expired_at = time.monotonic()
+
+    def _sxsy_cookie_expired(self, cookie: str) -> bool:
+        """Cookie 是否在 SXSY_COOKIE_RECHECK 秒内被判定失效；超过后放行搜索重新确认，
+        未开启预热时失效标记也不会一直阻止搜索"""
+        return (
+            cookie == self._sxsy_expired_cookie
+            and time.monotonic() - self._sxsy_expired_at < self.SXSY_COOKIE_RECHECK
+        )
+
+    async def _prewarm_loop(self):
+        """后台定期预热：刷新站点网址、保持搜书吧登录并预取 formhash、校验尚香书苑 Cookie，
+        使用户搜索时只需发送搜索请求本身"""
+        while True:
+            try:
+                await self._prewarm()
             except Exception as e:
-                logger.error(f"[SSB 搜索] 出错: {e}")
-                yield event.plain_result(f" 搜索过程中发生错误: {str(e)}")
+                logger.error(f"[预热] 出错: {e}")
+            await asyncio.sleep(self.prewarm_interval)
+
+    async def _prewarm(self):
+        resolvers = {
+            "ssb": self._resolve_ssb_url,
+            "sxsy": self._resolve_sxsy_host,
+            "sis": self._resolve_sis_url,
+            "01bz": self._resolve_dybz_url,
+            "uaa": self._resolve_uaa_url,
+        }
+        # 缓存中仍有效的网址无需刷新，过期或缺失的在此统一解析
+        refreshing = [
+            self._refresh_site_url(site, resolver)
+            for site, resolver in resolvers.items()
+            if self.url_cache.get(site)[1]
+        ]
+        if refreshing:
+            await asyncio.gather(*refreshing, return_exceptions=True)
+
+        # 冷却中的账号不预热，避免反复登录
+        jobs = [
+            self._ssb_prewarm(username, password)
+            for username, password in self.ssb_accounts.items()
+            if not self.ssb_scheduler.is_cooling(username)
+        ]
+        cookie = self.plugin_config.get("sxsy_cookie", "") if self.plugin_config else ""
+        if cookie:
+            jobs.append(self._sxsy_prewarm(cookie))
+        for result in await asyncio.gather(*jobs, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.warning(f"[预热] 失败: {result}")
+
+    async def _ssb_prewarm(self, username: str, password: str):
+        base_url = await self._ssb_base_url()
+        if not base_url:
+            return
+        session = self._get_session(f"ssb:{username}")
+        # 登录确认会在下次预热前过期时提前校验，避免由用户搜索承担
+        verified_at = self._ssb_verified_at.get(username)
+        if verified_at and time.time() - verified_at >= self.ssb_login_check_interval - self.prewarm_interval:
+            self._ssb_verified_at.pop(username, None)
+        try:
+            await self._ssb_ensure_login(session, base_url, username, password)
+        except AccountUnavailableError:
+            # 与搜索一致地暂停账号，避免每轮预热都用被拒绝的账密重复登录
+            self._cool_down_ssb_account(username)
+            raise
+        search_url = urljoin(base_url, "search.php?mod=forum")
+        await self._get_formhash(session, self._ssb_formhash_key(username, base_url), search_url, self.headers)
+
+    async def _sxsy_prewarm(self, cookie: str):
+        host = await self._get_site_url("sxsy", self._resolve_sxsy_host) or "sxsy87.com"
+        session = self._get_session("sxsy")
+        search_url = f"{self.SXSY_SCHEME}://{host}/search.php?mod=forum"
+        async with session.get(search_url, headers=self._sxsy_headers(host, cookie), timeout=10, ssl=False) as resp:
+            html = await self._get_text(resp)
+        if self._sxsy_logged_out(html):
+            self._formhashes.pop(f"sxsy@{host}", None)
+            self._mark_sxsy_cookie_expired(cookie)
+            return
+        if self._sxsy_expired_cookie == cookie:
+            self._sxsy_expired_cookie = None
+        formhash = extract_formhash(html)
+        if formhash:
+            self._formhashes[f"sxsy@{host}"] = formhash
+
+    def _queue_notice(self, site_name: str, keyword: str, ticket: Ticket) -> str:
+        if ticket.shared:
+            return f"🔍 相同的{site_name}搜索正在进行中，完成后一并返回: {keyword}"
+        if ticket.wait > 0:
+            return f"⏳ {site_name}搜索排队中，前面还有 {ticket.ahead} 个搜索，预计 {int(ticket.wait) + 1} 秒后开始: {keyword}"
+        return f"🔍 正在{site_name}搜索: {keyword}..."
+
+    @filter.command("ssb", alias={'搜书吧'})
+    async def ssb_command(self, event: AstrMessageEvent):
+        """获取搜书吧的网址或搜索书籍"""
+        args = event.message_str.strip().split(maxsplit=1)
+        if len(args) < 2:
+            # 获取网址逻辑
+            link_url = await self._get_site_url("ssb", self._resolve_ssb_url)
+            if link_url:
+                yield event.plain_result(f"📖 成功找到搜书吧最新网址：\n{link_url}")
+                return
+            yield event.plain_result("❌ 抱歉，所有导航网站均无法访问或未找到可用链接。")
+            return
+
+        # 搜索逻辑
+        keyword = args[1]
+
+        # 命中结果缓存时直接返回，不占用搜索次数
+        cache_key, cached = self._cached_results("ssb", keyword)
+        if cached:
+            yield event.plain_result(self._format_results(keyword, cached))
+            return
+
+        if not self.ssb_accounts:
+            yield event.plain_result(" 请先在插件配置中设置 ssb_auth (格式: 账号&密码)。")
+            return
+
+        # 分配给最早空闲的账号，按账号搜索间隔排队，相同关键词的搜索共用一次请求
+        try:
+            ticket = self.ssb_scheduler.submit(
+                cache_key, lambda username: self._timed("search", "ssb", self._ssb_account_search(keyword, username))
+            )
+        except QueueFullError:
+            yield event.plain_result(await self._offline_reply("ssb", keyword, "搜书吧搜索排队人数过多，请稍后再试。"))
+            return
+        except NoLaneAvailableError:
+            yield event.plain_result(await self._offline_reply(
+                "ssb", keyword, " 搜书吧账号均触发验证码或登录失败，暂停使用中，请稍后再试。"
+            ))
+            return
+        self._observe_queue("ssb", ticket)
+        yield event.plain_result(self._queue_notice("搜书吧", keyword, ticket))
+
+        # 排队已满、触发验证码或站点不可用时，从本地索引返回缓存结果
+        try:
+            result = await asyncio.shield(ticket.future)
+        except (AccountUnavailableError, SiteUnavailableError) as e:
+            yield event.plain_result(await self._offline_reply("ssb", keyword, str(e)))
+            return
+        except NoLaneAvailableError:
+            # 排队期间所有账号都进入了冷却
+            yield event.plain_result(await self._offline_reply(
+                "ssb", keyword, " 搜书吧账号均触发验证码或登录失败，暂停使用中，请稍后再试。"
+            ))
+            return
+        except SearchError as e:
+            yield event.plain_result(str(e))
+            return
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"[SSB 搜索] 出错: {e}")
+            yield event.plain_result(await self._offline_reply("ssb", keyword, f" 搜索过程中发生错误: {str(e)}"))
+            return
+        except Exception as e:
+            logger.error(f"[SSB 搜索] 出错: {e}")
+            yield event.plain_result(f" 搜索过程中发生错误: {str(e)}")
+            return
+
+        if not result.results:
+            yield event.plain_result(f" 未找到与 {keyword} 相关的结果。")
+            return
+        async for message in self._reply_results(event, keyword, cache_key, result):
+            yield message
 
     @filter.command("sxsy", alias={'尚香书苑'})
     async def sxsy_command(self, event: AstrMessageEvent):
@@ -317,169 +1083,218 @@ class SoushuBaLinkExtractorPlugin(Star):
         args = event.message_str.strip().split(maxsplit=1)
         if len(args) < 2:
             # 基础网址获取逻辑
-            async with aiohttp.ClientSession() as session:
-                try:
-                    url = "https://sxsy.org/"
-                    async with session.get(url, headers=self.headers, timeout=10, ssl=False) as response:
-                        if response.status == 200:
-                            text = await self._get_text(response)
-                            match = re.search(r'href="https://([^"]+)"', text)
-                            if match:
-                                yield event.plain_result(f"🌸 成功找到尚香书苑最新网址：\nhttps://{match.group(1)}")
-                                return
-                except Exception as e:
-                    logger.error(f"[获取sxsy host] 错误: {e}")
+            host = await self._get_site_url("sxsy", self._resolve_sxsy_host)
+            if host:
+                yield event.plain_result(f"🌸 成功找到尚香书苑最新网址：\n{self.SXSY_SCHEME}://{host}")
+                return
             yield event.plain_result("❌ 抱歉，尚香书苑导航站目前无法访问。")
             return
 
         keyword = args[1]
+        cache_key, cached = self._cached_results("sxsy", keyword)
+        if cached:
+            yield event.plain_result(self._format_results(keyword, cached))
+            return
+
         cookie = self.plugin_config.get("sxsy_cookie", "") if self.plugin_config else ""
         if not cookie:
             yield event.plain_result("❌ 请先在插件配置中设置 sxsy_cookie。")
             return
+        if self._sxsy_cookie_expired(cookie):
+            yield event.plain_result("❌ Cookie 已失效或未登录，请更新CK。")
+            return
 
-        yield event.plain_result(f"🔍 正在尚香书苑搜索: {keyword}...")
+        try:
+            ticket = self.sxsy_scheduler.submit(
+                cache_key, lambda _: self._timed("search", "sxsy", self._sxsy_search(keyword, cookie))
+            )
+        except QueueFullError:
+            yield event.plain_result(await self._offline_reply("sxsy", keyword, "❌ 尚香书苑搜索排队人数过多，请稍后再试。"))
+            return
+        self._observe_queue("sxsy", ticket)
+        yield event.plain_result(self._queue_notice("尚香书苑", keyword, ticket))
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                # 1. 获取最新 host
-                host = "sxsy87.com"
-                try:
-                    async with session.get("https://sxsy.org/", timeout=10, ssl=False) as resp:
-                        if resp.status == 200:
-                            t = await self._get_text(resp)
-                            m = re.search(r'href="https://([^"]+)"', t)
-                            if m: host = m.group(1)
-                except: pass
+        try:
+            result = await asyncio.shield(ticket.future)
+        except SearchError as e:
+            yield event.plain_result(str(e))
+            return
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"sxsy 搜索出错: {e}")
+            yield event.plain_result(await self._offline_reply(
+                "sxsy", keyword, f"❌ 搜索过程中发生错误: {str(e)}，请稍后重试。"
+            ))
+            return
+        except Exception as e:
+            logger.error(f"sxsy 搜索出错: {e}")
+            yield event.plain_result(f"❌ 搜索过程中发生错误: {str(e)}，请稍后重试。")
+            return
 
-                # 2. 准备 POST 请求
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36',
-                    'Cookie': cookie,
-                    'Referer': f"https://{host}/search.php?mod=forum"
-                }
-                post_url = f"https://{host}/search.php?mod=forum"
+        if not result.results:
+            yield event.plain_result(f"📦 尚香书苑未找到与 “{keyword}” 相关的搜索结果。")
+            return
+        async for message in self._reply_results(event, keyword, cache_key, result):
+            yield message
 
-                # 提取 formhash
-                formhash = ""
-                try:
-                    async with session.get(post_url, headers=headers, timeout=10, ssl=False) as f_resp:
-                        f_html = await self._get_text(f_resp)
-                        fh_match = re.search(r'name="formhash" value="([a-f0-9]+)"', f_html)
-                        if fh_match: formhash = fh_match.group(1)
-                except: pass
+    def _cache_finished(self, key: str, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is None and future.result():
+            self._cache_results(key, future.result())
 
-                post_data = {
-                    'mod': 'forum',
-                    'searchsubmit': 'yes',
-                    'srchtxt': keyword,
-                    'formhash': formhash
-                }
+    @staticmethod
+    def _merge_results(results_by_site: List[tuple]) -> List[dict]:
+        """按站点顺序合并结果，标题规范化后相同的记录只保留第一条并记录全部来源"""
+        merged: Dict[str, dict] = {}
+        for site_name, results in results_by_site:
+            for r in results:
+                key = re.sub(r"\s+", "", unicodedata.normalize("NFKC", r["title"])).lower()
+                if key in merged:
+                    merged[key]["sources"].append(site_name)
+                else:
+                    merged[key] = dict(r, sources=[site_name])
+        return list(merged.values())
 
-                # 3. 发送 POST 搜索
-                logger.info(f"[sxsy 搜索] 尝试 POST 搜索: {post_url}")
-                async with session.post(post_url, data=post_data, headers=headers, timeout=15, ssl=False) as p_resp:
-                    html = await self._get_text(p_resp)
-                    logger.info(f"[sxsy 搜索] POST 响应 URL: {p_resp.url}, 长度: {len(html)}")
-
-                # 4. 检查异常状态
-                # CK 失效特征：页面标题包含“登录”，或者 body 带有 pg_logging 类，或者包含特定的登录 action 链接
-                if '<title>登录 -  尚香书苑  </title>' in html or 'class="pg_logging"' in html or 'member.php?mod=logging&action=login' in html:
-                    yield event.plain_result("❌ Cookie 已失效或未登录，请更新CK。")
-                    return
-                
-                # 搜索无结果特征：包含“对不起，没有找到匹配结果。”或者结果数为 0
-                if "对不起，没有找到匹配结果。" in html or "相关内容 0 个" in html:
-                    yield event.plain_result(f"📦 尚香书苑未找到与 “{keyword}” 相关的搜索结果。")
-                    return
-
-                # 5. 解析结果
-                soup = BeautifulSoup(html, 'lxml')
-                items = soup.select('div#threadlist ul li.pbw') or soup.select('div.slst ul li.pbw')
-                logger.info(f"[sxsy 搜索] 解析到 {len(items)} 条结果")
-
-                if not items:
-                    yield event.plain_result("❌ 无法获取搜索结果，请检查 Cookie 是否过期。")
-                    return
-
-                results = []
-                for i, item in enumerate(items[:self.search_result_count], 1):
-                    title_el = item.select_one('h3.xs3 a')
-                    if not title_el: continue
-                    
-                    title = "".join(title_el.find_all(string=True, recursive=True)).strip()
-                    link = urljoin(f"https://{host}/", title_el['href'])
-                    
-                    # 提取时间
-                    time_text = "未知"
-                    time_span = item.select_one('p span') # Discuz 搜索页通常第一个 span 是时间
-                    if time_span:
-                        time_text = time_span.get_text(strip=True)
-                    
-                    results.append(f"【{i}】{title}\n📅 时间: {time_text}\n🔗 {link}")
-
-                reply = f"✅ 为您找到以下关于 “{keyword}” 的结果：\n\n" + "\n\n".join(results)
-                yield event.plain_result(reply)
+    @filter.command("sall", alias={'聚合搜索'})
+    async def federated_command(self, event: AstrMessageEvent):
+        """同时在搜书吧和尚香书苑搜索，合并去重后返回"""
+        args = event.message_str.strip().split(maxsplit=1)
+        if len(args) < 2:
+            yield event.plain_result("❌ 请提供搜索关键词，例如：/sall 斗罗大陆")
+            return
+        keyword = args[1]
 
-            except Exception as e:
-                logger.error(f"sxsy 搜索出错: {e}")
-                yield event.plain_result(f"❌ 搜索过程中发生错误: {str(e)}，请稍后重试。")
+        sites = []
+        if self.ssb_accounts:
+            sites.append(("ssb", "搜书吧", self.ssb_scheduler,
+                          lambda username: self._timed("search", "ssb", self._ssb_account_search(keyword, username))))
+        notes = []
+        cookie = self.plugin_config.get("sxsy_cookie", "") if self.plugin_config else ""
+        if cookie and self._sxsy_cookie_expired(cookie):
+            notes.append("尚香书苑: Cookie 已失效，请更新CK")
+        elif cookie:
+            sites.append(("sxsy", "尚香书苑", self.sxsy_scheduler,
+                          lambda _: self._timed("search", "sxsy", self._sxsy_search(keyword, cookie))))
+        if not self.ssb_accounts and not cookie:
+            yield event.plain_result("❌ 请先在插件配置中设置 ssb_auth 或 sxsy_cookie。")
+            return
+
+        # 各站点复用自身的结果缓存与排队调度，在共同的截止时间内并发等待
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for site, site_name, scheduler, factory in sites:
+            cache_key, cached = self._cached_results(site, keyword)
+            if cached:
+                future = loop.create_future()
+                future.set_result(SearchResult(cached))
+                futures[site_name] = future
+                continue
+            try:
+                ticket = scheduler.submit(cache_key, factory)
+            except (QueueFullError, NoLaneAvailableError):
+                notes.append(f"{site_name}: 暂时无法搜索，请稍后再试")
+                continue
+            self._observe_queue(site, ticket)
+            # 截止时间后才完成的搜索仍在后台收齐全部页并写入缓存，稍后重试可直接返回
+            pages = self._spawn(self._all_pages(ticket.future))
+            pages.add_done_callback(lambda f, key=cache_key: self._cache_finished(key, f))
+            futures[site_name] = ticket.future
+
+        # asyncio.wait 超时不会取消搜索，未完成的搜索留在调度器中继续执行；
+        # 先等各站点的第一页，再在剩余时间内等已到达站点的后续页
+        deadline = loop.time() + self.federated_timeout
+        if not all(future.done() for future in futures.values()):
+            yield event.plain_result(f"🔍 正在{'、'.join(futures)}同时搜索: {keyword}...")
+            await asyncio.wait(futures.values(), timeout=self.federated_timeout)
+        more_pages = [
+            future.result().more for future in futures.values()
+            if future.done() and not future.cancelled() and future.exception() is None and future.result().more
+        ]
+        if more_pages and not all(more.done() for more in more_pages):
+            await asyncio.wait(more_pages, timeout=max(0.0, deadline - loop.time()))
+
+        results_by_site = []
+        for site_name, future in futures.items():
+            if not future.done():
+                notes.append(f"{site_name}: 超时，仍在后台搜索，稍后重试可直接获取")
+            elif future.cancelled():
+                notes.append(f"{site_name}: 搜索已取消")
+            elif isinstance(future.exception(), SearchError):
+                notes.append(f"{site_name}: {str(future.exception()).strip()}")
+            elif isinstance(future.exception(), NoLaneAvailableError):
+                notes.append(f"{site_name}: 暂时无法搜索，请稍后再试")
+            elif future.exception() is not None:
+                logger.error(f"[聚合搜索] {site_name} 出错: {future.exception()}")
+                notes.append(f"{site_name}: 搜索过程中发生错误")
+            else:
+                result = future.result()
+                results = result.results
+                if result.more is None:
+                    pass
+                elif not result.more.done():
+                    notes.append(f"{site_name}: 仅包含第一页结果，更多结果仍在加载，稍后重试可直接获取")
+                elif not result.more.cancelled() and result.more.exception() is None:
+                    results = results + result.more.result()
+                results_by_site.append((site_name, results))
+
+        merged = self._merge_results(results_by_site)
+        if merged:
+            message = self._format_results(keyword, merged)
+        elif futures:
+            message = f"📦 未找到与 “{keyword}” 相关的结果。"
+        else:
+            message = f"❌ 暂时无法搜索: {keyword}"
+        if notes:
+            message += "\n\n⚠️ " + "\n⚠️ ".join(notes)
+        yield event.plain_result(message)
 
     @filter.command("sis", alias={'第一会所'})
     async def sis_command(self, event: AstrMessageEvent):
         """获取第一会所的网址"""
-        target_navs = ["http://sis001dz.org/", "http://www.sis001home.com/"]
-        async with aiohttp.ClientSession() as session:
-            for url in target_navs:
-                try:
-                    async with session.get(url, headers=self.headers, timeout=10) as response:
-                        if response.status == 200:
-                            text = await self._get_text(response)
-                            soup = BeautifulSoup(text, 'lxml')
-                            link_element = soup.find('a', string=re.compile(r'地址一'))
-                            if link_element and link_element.has_attr('href'):
-                                yield event.plain_result(f"🔞 成功找到第一会所最新网址：\n{link_element['href']}")
-                                return
-                except: continue
+        link_url = await self._get_site_url("sis", self._resolve_sis_url)
+        if link_url:
+            yield event.plain_result(f"🔞 成功找到第一会所最新网址：\n{link_url}")
+            return
         yield event.plain_result("❌ 抱歉，第一会所导航站目前无法访问。")
 
     @filter.command("01bz", alias={'第一版主'})
     async def dybz_command(self, event: AstrMessageEvent):
         """获取第一版主的网址"""
-        target_navs = ["https://www.龙腾小说.com/", "http://01bz.cc/"]
-        async with aiohttp.ClientSession() as session:
-            for url in target_navs:
-                try:
-                    async with session.get(url, headers=self.headers, timeout=10) as response:
-                        if response.status == 200:
-                            text = await self._get_text(response)
-                            soup = BeautifulSoup(text, 'lxml')
-                            link_element = soup.find('a', string=re.compile(r'最新线路\s*1'))
-                            if link_element and link_element.has_attr('href'):
-                                yield event.plain_result(f"📚 成功找到第一版主最新网址：\n{link_element['href']}")
-                                return
-                except: continue
+        link_url = await self._get_site_url("01bz", self._resolve_dybz_url)
+        if link_url:
+            yield event.plain_result(f"📚 成功找到第一版主最新网址：\n{link_url}")
+            return
         yield event.plain_result("❌ 抱歉，第一版主导航站目前无法访问。")
 
     @filter.command("uaa", alias={'有爱爱'})
     async def uaa_command(self, event: AstrMessageEvent):
         """获取有爱爱的网址"""
-        url = "https://uaadizhi.com/"
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=self.headers, timeout=10) as response:
-                    if response.status == 200:
-                        text = await self._get_text(response)
-                        soup = BeautifulSoup(text, 'lxml')
-                        for li in soup.find_all('li'):
-                            span = li.find('span')
-                            if span and '最新' in span.get_text():
-                                a_tag = li.find('a')
-                                if a_tag:
-                                    yield event.plain_result(f"💕 成功找到有爱爱最新网址：\n{a_tag['href']}")
-                                    return
-            except: pass
+        link_url = await self._get_site_url("uaa", self._resolve_uaa_url)
+        if link_url:
+            yield event.plain_result(f"💕 成功找到有爱爱最新网址：\n{link_url}")
+            return
         yield event.plain_result("❌ 抱歉，有爱爱导航站目前无法访问。")
 
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("ssbstats", alias={'搜书统计'})
+    async def stats_command(self, event: AstrMessageEvent):
+        """查看各阶段耗时分位数与请求计数（管理员）"""
+        yield event.plain_result(self.metrics.report())
+
     async def terminate(self):
+        for task in list(self._url_refreshing.values()):
+            task.cancel()
+        for task in list(self._background_tasks):
+            task.cancel()
+        self.ssb_scheduler.cancel_all()
+        self.sxsy_scheduler.cancel_all()
+        # 每次写入都在执行时才序列化，等最后一个写入完成即落盘了最新内容
+        while self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        await self._persist_mirror_health()
+        if self.metrics.export:
+            await self._export_metrics(self.metrics.drain())
+        if self.thread_index:
+            await self.thread_index.close()
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
         logger.info("搜书吧链接获取插件已卸载")
@@ -0,0 +1,93 @@
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Metrics:
+    """各阶段耗时与计数统计。
+
+    span() 记录一次阶段耗时，按 (阶段, 标签) 保留最近 WINDOW 次样本用于计算分位数；
+    incr() 累加请求数、字节数、缓存命中、失败次数等计数。开启导出时每个样本同时进入
+    缓冲区，攒满 EXPORT_BATCH 条后交给 on_export 写出。
+    """
+
+    WINDOW = 1000
+    EXPORT_BATCH = 100
+
+    def __init__(self, export: bool = False, on_export: Optional[Callable[[List[dict]], None]] = None):
+        self.export = export
+        self.on_export = on_export
+        self.started_at = time.time()
+        self._samples: Dict[Tuple[str, str], deque] = defaultdict(lambda: deque(maxlen=self.WINDOW))
+        self._failures: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._counters: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._buffer: List[dict] = []
+
+    @contextmanager
+    def span(self, stage: str, label: str = ""):
+        """统计 with 块的耗时；块内抛出异常计为失败，任务被取消则不计入"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.observe(stage, label, time.perf_counter() - start, ok=False)
+            raise
+        self.observe(stage, label, time.perf_counter() - start)
+
+    def observe(self, stage: str, label: str, seconds: float, ok: bool = True):
+        key = (stage, label)
+        self._samples[key].append(seconds)
+        if not ok:
+            self._failures[key] += 1
+        if self.export:
+            self._buffer.append({
+                "ts": round(time.time(), 3),
+                "stage": stage,
+                "label": label,
+                "ms": round(seconds * 1000, 2),
+                "ok": ok,
+            })
+            if len(self._buffer) >= self.EXPORT_BATCH:
+                self._emit()
+
+    def incr(self, name: str, label: str = "", value: int = 1):
+        self._counters[(name, label)] += value
+
+    def percentile(self, stage: str, label: str, q: float) -> Optional[float]:
+        samples = self._samples.get((stage, label))
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def drain(self) -> List[dict]:
+        """取出尚未导出的样本"""
+        records, self._buffer = self._buffer, []
+        return records
+
+    def _emit(self):
+        records = self.drain()
+        if self.on_export and records:
+            self.on_export(records)
+
+    def report(self) -> str:
+        """按阶段输出样本数、p50、p95 与失败次数，以及全部计数"""
+        lines = [f"📊 统计自 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at))}"]
+        if self._samples:
+            lines.append("\n⏱ 阶段耗时（毫秒）：")
+            for stage, label in sorted(self._samples):
+                samples = self._samples[(stage, label)]
+                name = f"{stage}[{label}]" if label else stage
+                p50 = self.percentile(stage, label, 0.5) * 1000
+                p95 = self.percentile(stage, label, 0.95) * 1000
+                failures = self._failures.get((stage, label), 0)
+                lines.append(f"{name}: n={len(samples)} p50={p50:.0f} p95={p95:.0f} 失败={failures}")
+        if self._counters:
+            lines.append("\n🔢 计数：")
+            for name, label in sorted(self._counters):
+                key = f"{name}[{label}]" if label else name
+                lines.append(f"{key}: {self._counters[(name, label)]}")
+        if len(lines) == 1:
+            lines.append("暂无数据")
+        return "\n".join(lines)
@@ -0,0 +1,61 @@
+import codecs
+import re
+from typing import List, Optional, Pattern, Match, Tuple
+
+import aiohttp
+
+from .charset import normalize_charset, sniff_charset
+
+# 搜书吧导航页：跳转页（JS / meta refresh）与落地页上的 a.link
+JS_REDIRECT = re.compile(r"window\.location\.href\s*=\s*['\"](.*?)['\"];")
+META_REFRESH = re.compile(r"<meta http-equiv=\"refresh\" content=\"[\d\.]*;\s*url=(.*?)\"", re.IGNORECASE)
+SSB_LINK_TAG = re.compile(r"<a\s[^>]*\bclass=[\"'](?:[^\"']*\s)?link(?:\s[^\"']*)?[\"'][^>]*>", re.IGNORECASE)
+
+# 其他站点导航页上的目标链接
+SIS_LINK = re.compile(r"<a\s[^>]*\bhref=[\"']([^\"']+)[\"'][^>]*>[^<]*地址一", re.IGNORECASE)
+DYBZ_LINK = re.compile(r"<a\s[^>]*\bhref=[\"']([^\"']+)[\"'][^>]*>[^<]*最新线路\s*1", re.IGNORECASE)
+UAA_LATEST_LI = re.compile(r"<li\b[^>]*>(?:(?!</li>).)*?<span\b[^>]*>[^<]*最新(?:(?!</li>).)*?</li>", re.IGNORECASE | re.DOTALL)
+
+HREF_ATTR = re.compile(r"\bhref=[\"']([^\"']*)[\"']", re.IGNORECASE)
+A_HREF = re.compile(r"<a\s[^>]*\bhref=[\"']([^\"']*)[\"']", re.IGNORECASE)
+
+STREAM_CHUNK_SIZE = 8192
+# 每次只从上次扫描位置往前回退这么多字符重新匹配，覆盖跨分块的目标
+STREAM_SCAN_OVERLAP = 4096
+
+
+async def scan_stream(
+    response: aiohttp.ClientResponse,
+    patterns: List[Pattern],
+    hint: Optional[str] = None,
+) -> Tuple[Optional[int], Optional[Match], bytes]:
+    """边接收边扫描响应内容，命中任一模式即关闭连接停止读取。
+
+    每个分块按 patterns 的顺序依次匹配，返回 (模式序号, 匹配结果, 已读取的字节)；
+    读完整个响应仍未命中时返回 (None, None, 完整响应体)，由调用方回退到 DOM 解析。
+    编码依次取响应头声明、首个分块中 <meta> 声明、调用方记住的 hint，都没有时按 UTF-8 解码。
+    """
+    charset = normalize_charset(response.charset)
+    decoder = None
+    chunks = []
+    text = ""
+    final = False
+    iterator = response.content.iter_chunked(STREAM_CHUNK_SIZE)
+    while not final:
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            chunk, final = b"", True
+        chunks.append(chunk)
+        if decoder is None:
+            encoding = charset or sniff_charset(chunk) or normalize_charset(hint) or "utf-8"
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        start = max(0, len(text) - STREAM_SCAN_OVERLAP)
+        text += decoder.decode(chunk, final=final)
+        for index, pattern in enumerate(patterns):
+            match = pattern.search(text, start)
+            if match:
+                if not final:
+                    response.close()
+                return index, match, b"".join(chunks)
+    return None, None, b"".join(chunks)
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+async def first_success(
+    factories: List[Callable[[], Awaitable[Optional[T]]]],
+    hedge_delay: float = 0,
+) -> Optional[T]:
+    """并发执行多个候选任务，返回第一个有效结果并取消其余任务。
+
+    hedge_delay <= 0 时所有候选同时启动；hedge_delay > 0 时为对冲模式，
+    按顺序启动候选，前一个在 hedge_delay 秒内未返回（或已失败）才启动下一个。
+    候选返回 None 或抛出异常均视为失败，全部失败时返回 None。
+    """
+    queue = list(factories)
+    pending = set()
+    try:
+        while queue or pending:
+            if queue:
+                if hedge_delay <= 0:
+                    while queue:
+                        pending.add(asyncio.ensure_future(queue.pop(0)()))
+                else:
+                    pending.add(asyncio.ensure_future(queue.pop(0)()))
+
+            timeout = hedge_delay if queue and hedge_delay > 0 else None
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                result = task.result()
+                if result:
+                    return result
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
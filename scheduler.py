@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, NamedTuple, Sequence, Tuple
+
+
+class QueueFullError(Exception):
+    """排队中的搜索数已达上限"""
+
+
+class NoLaneAvailableError(Exception):
+    """所有通道都在冷却中"""
+
+
+class Ticket(NamedTuple):
+    future: asyncio.Future
+    shared: bool  # 是否复用了进行中的相同搜索
+    ahead: int  # 前方尚未完成的搜索数
+    wait: float  # 预计等待秒数
+
+
+class SearchScheduler:
+    """站点搜索调度器。
+
+    按站点允许的最小间隔依次放行搜索，而不是直接拒绝；
+    相同 key 的搜索在完成前只会向站点发出一次请求，其余调用共享结果（singleflight）。
+
+    可配置多个通道（如多个账号），每个通道各自遵守搜索间隔，新搜索分配给最早空闲的通道，
+    factory 以通道名为参数调用；冷却中的通道暂不参与分配，排队期间所在通道进入冷却的搜索
+    会改排到其他可用通道。
+    """
+
+    def __init__(self, interval: float, max_queue: int = 0, lanes: Sequence[str] = ("",)):
+        self.interval = interval
+        self.max_queue = max_queue
+        self._next_slots: Dict[str, float] = {lane: 0.0 for lane in lanes}
+        self._cooldowns: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._slots: Dict[str, Tuple[str, float]] = {}
+
+    @property
+    def lanes(self) -> list:
+        return list(self._next_slots)
+
+    def cool_down(self, lane: str, duration: float):
+        """在 duration 秒内不再向该通道分配搜索"""
+        self._cooldowns[lane] = time.monotonic() + duration
+
+    def is_cooling(self, lane: str) -> bool:
+        return self._cooldowns.get(lane, 0.0) > time.monotonic()
+
+    def submit(self, key: str, factory: Callable[[str], Awaitable]) -> Ticket:
+        task = self._inflight.get(key)
+        if task is not None:
+            return Ticket(task, True, 0, 0)
+
+        now = time.monotonic()
+        waiting = sum(1 for _, slot in self._slots.values() if slot > now)
+        if self.max_queue > 0 and waiting >= self.max_queue:
+            raise QueueFullError()
+
+        lane, slot = self._reserve(now)
+        ahead = sum(1 for name, _ in self._slots.values() if name == lane)
+
+        task = asyncio.ensure_future(self._run(key, slot, lane, factory))
+        self._inflight[key] = task
+        self._slots[key] = (lane, slot)
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return Ticket(task, False, ahead, slot - now)
+
+    def _reserve(self, now: float) -> Tuple[str, float]:
+        """在最早空闲的非冷却通道上占用下一个时间槽，返回 (通道, 开始时间)"""
+        lanes = [lane for lane in self._next_slots if not self.is_cooling(lane)]
+        if not lanes:
+            raise NoLaneAvailableError()
+        lane = min(lanes, key=lambda name: self._next_slots[name])
+        slot = max(now, self._next_slots[lane])
+        self._next_slots[lane] = slot + self.interval
+        return lane, slot
+
+    async def _run(self, key: str, slot: float, lane: str, factory: Callable[[str], Awaitable]):
+        while True:
+            delay = slot - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self.is_cooling(lane):
+                return await factory(lane)
+            # 排队期间通道进入冷却，改排到其他可用通道，都在冷却时抛出 NoLaneAvailableError
+            lane, slot = self._reserve(time.monotonic())
+            self._slots[key] = (lane, slot)
+
+    def _on_done(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._slots.pop(key, None)
+        # 所有等待方都已离开时避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    def cancel_all(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import os
+import tempfile
+from typing import Dict
+
+# 同一文件的写入按调用顺序串行，避免较旧的快照覆盖较新的内容
+_write_locks: Dict[str, asyncio.Lock] = {}
+
+
+def read_json(path: str, default=None):
+    """读取 JSON 文件，文件不存在或损坏时返回 default"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_text_atomic_sync(path: str, text: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+async def write_json_atomic(path: str, data) -> None:
+    """在线程池中写入临时文件后原子替换目标文件，避免阻塞事件循环或写出半截文件。
+
+    序列化在调用方所在的事件循环线程完成，写入期间 data 被修改也不会影响落盘内容。
+    """
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    lock = _write_locks.setdefault(path, asyncio.Lock())
+    async with lock:
+        await asyncio.to_thread(_write_text_atomic_sync, path, text)
+
+
+def _append_text_sync(path: str, text: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+async def append_jsonl(path: str, records) -> None:
+    """在线程池中把记录逐行以 JSON 追加到文件末尾"""
+    text = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    lock = _write_locks.setdefault(path, asyncio.Lock())
+    async with lock:
+        await asyncio.to_thread(_append_text_sync, path, text)